@@ -3,6 +3,85 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost/sukseskontraktor")
+# URL untuk engine async (endpoint /assistant/query/async); kosong = DATABASE_URL dengan driver async
+# (mysql+aiomysql untuk MySQL, sqlite+aiosqlite untuk SQLite/test)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8001))
+# Interval (detik) snapshot katalog produk dicek ulang ke DB
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", 30))
+# Direktori artefak KB (embedding, index FAISS, classifier) per versi
+KB_ARTIFACTS_DIR = os.getenv(
+    "KB_ARTIFACTS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "artifacts")
+)
+# Cache embedding query & hasil intent (key: teks yang sudah di-preprocess)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 4096))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", 3600))
+# Daftar alat: jumlah baris halaman pertama di chat, batas limit API /equipment, batch fetch stream NDJSON
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 20))
+LISTING_MAX_PAGE_SIZE = int(os.getenv("LISTING_MAX_PAGE_SIZE", 500))
+LISTING_STREAM_BATCH = int(os.getenv("LISTING_STREAM_BATCH", 1000))
+# Tier classifier (fallback setelah FAISS): "logreg" (LogisticRegression) atau "centroid" (centroid per intent);
+# keduanya disimpan sebagai satu matriks bobot dan dikalibrasi (temperature scaling)
+CLASSIFIER_TYPE = os.getenv("CLASSIFIER_TYPE", "logreg")
+# Micro-batching encode query dari request yang berjalan bersamaan
+ENCODER_BATCHING = os.getenv("ENCODER_BATCHING", "1") == "1"
+ENCODER_MAX_BATCH_SIZE = int(os.getenv("ENCODER_MAX_BATCH_SIZE", 32))
+ENCODER_MAX_WAIT_MS = float(os.getenv("ENCODER_MAX_WAIT_MS", 3))
+# Admission control tier semantic + classifier: maks. request bersamaan, antrian tunggu terbatas;
+# kalau penuh: "degrade" (intent keyword saja, meta.source="degraded") atau "reject" (503 + Retry-After).
+# Slot dipegang selama encode, jadi dengan micro-batching batas ini juga batas isi batch encoder:
+# default = 2 batch penuh (satu sedang di-encode, satu sedang dikumpulkan), tanpa batching = jumlah CPU
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_MAX_CONCURRENT = int(os.getenv(
+    "ADMISSION_MAX_CONCURRENT", 2 * ENCODER_MAX_BATCH_SIZE if ENCODER_BATCHING else os.cpu_count() or 4
+))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 32))
+ADMISSION_MAX_WAIT_MS = float(os.getenv("ADMISSION_MAX_WAIT_MS", 500))
+ADMISSION_MODE = os.getenv("ADMISSION_MODE", "degrade")
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+# Thread pool inference untuk endpoint async: jumlah thread, tugas yang boleh antri di atasnya = ADMISSION_MAX_QUEUE
+INFERENCE_POOL_WORKERS = int(os.getenv("INFERENCE_POOL_WORKERS", ADMISSION_MAX_CONCURRENT))
+# Cache jawaban yang dirender dari katalog (list semua alat, daftar stok/harga); 0 = nonaktif
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))
+# Write-behind log percakapan: antrian in-memory, di-flush bulk INSERT per ukuran/waktu
+CONVERSATION_WRITE_BEHIND = os.getenv("CONVERSATION_WRITE_BEHIND", "1") == "1"
+CONVERSATION_QUEUE_SIZE = int(os.getenv("CONVERSATION_QUEUE_SIZE", 10000))
+CONVERSATION_FLUSH_SIZE = int(os.getenv("CONVERSATION_FLUSH_SIZE", 100))
+CONVERSATION_FLUSH_INTERVAL_MS = float(os.getenv("CONVERSATION_FLUSH_INTERVAL_MS", 500))
+# Konteks percakapan per user di memori (ring buffer + LRU)
+CONTEXT_MAX_USERS = int(os.getenv("CONTEXT_MAX_USERS", 10000))
+CONTEXT_HISTORY_SIZE = int(os.getenv("CONTEXT_HISTORY_SIZE", 5))
+CONTEXT_WARM_FROM_DB = os.getenv("CONTEXT_WARM_FROM_DB", "1") == "1"
+# Buffer konteks di-warm ulang dari DB setelah sekian detik (pesan dari worker lain ikut terbaca);
+# 0 = tidak pernah, hanya aman untuk satu worker atau sticky session per user
+CONTEXT_TTL_SECONDS = float(os.getenv("CONTEXT_TTL_SECONDS", 30))
+# Instrumentasi latency per tahap (/metrics); METRICS_IN_META=1 menambahkan rincian waktu di meta
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_IN_META = os.getenv("METRICS_IN_META", "0") == "1"
+# Backend encoder: torch (SentenceTransformer), onnx, atau onnx-int8 (lihat app/encoders.py)
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv(
+    "ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "onnx")
+)
+# Index FAISS: auto (pilih dari ukuran KB), flat, hnsw, atau ivf (lihat app/vector_index.py)
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+INDEX_FLAT_MAX = int(os.getenv("INDEX_FLAT_MAX", 10000))
+INDEX_HNSW_MAX = int(os.getenv("INDEX_HNSW_MAX", 500000))
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", 32))
+INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", 80))
+INDEX_IVF_NLIST = int(os.getenv("INDEX_IVF_NLIST", 0))  # 0 = otomatis ~4*sqrt(n)
+# Parameter pencarian, bisa diubah tanpa build ulang artefak
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", 64))
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", 16))
+# Penyimpanan vektor KB di index: "float32" (tanpa kompresi), "float16" (1/2 memori) atau "sq8" (scalar
+# quantizer 8-bit, 1/4 memori); selain float32, salinan embedding di artefak juga disimpan float16
+# dan hot reload KB meng-encode ulang semua baris (tidak memakai ulang vektor float16)
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "float32")
+# Hot reload KB: interval (detik) cek perubahan file KB; 0 = hanya lewat endpoint admin
+KB_WATCH_SECONDS = float(os.getenv("KB_WATCH_SECONDS", 5))
+# Token untuk endpoint /assistant/admin/* (header X-Admin-Token); kosong = tanpa token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Jumlah kandidat dari index trigram yang di-scoring rapidfuzz per pencarian nama alat
+CATALOG_FUZZY_CANDIDATES = int(os.getenv("CATALOG_FUZZY_CANDIDATES", 100))
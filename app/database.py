@@ -1,9 +1,50 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
+from .config import DATABASE_URL, ASYNC_DATABASE_URL
 
 # Use read-only DB user in DATABASE_URL (grant SELECT only)
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# driver async untuk skema URL sync yang sama
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+
+def get_async_sessionmaker():
+    """
+    async_sessionmaker untuk ASYNC_DATABASE_URL (default: DATABASE_URL dengan driver async).
+    Engine dibuat saat pertama dipakai, jadi driver async (aiomysql/aiosqlite) hanya perlu
+    terpasang kalau endpoint async benar-benar dipanggil.
+    """
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+                _async_engine = create_async_engine(ASYNC_DATABASE_URL or async_url(DATABASE_URL), pool_pre_ping=True)
+                _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
@@ -1,35 +1,61 @@
-from sentence_transformers import SentenceTransformer
-import numpy as np
-import faiss
+import threading
+from .encoders import load_encoder
 from .kb_loader import load_kb
-from .config import EMBEDDING_MODEL
-from sklearn.ensemble import RandomForestClassifier
-
-KB_ENTRIES = load_kb()
+from .kb_manager import KBManager
+from .services.encoder import BatchingEncoder
+from .vector_index import index_stats
+from .config import ENCODER_BATCHING, ENCODER_MAX_BATCH_SIZE, ENCODER_MAX_WAIT_MS
 
 # fallback minimal if CSV kosong
-if not KB_ENTRIES:
-    KB_ENTRIES = [
-        {"text": "Berapa stok truk yang tersedia?", "intent": "check_stock"},
-        {"text": "stok truk masih ada ga", "intent": "check_stock"},
-        {"text": "Berapa harga excavator?", "intent": "ask_price"},
-        {"text": "Saya mau booking buldoser", "intent": "booking"},
-    ]
-
-MODEL = SentenceTransformer(EMBEDDING_MODEL)
-KB_TEXTS = [e["text"] for e in KB_ENTRIES]
-KB_INTENTS = [e["intent"] for e in KB_ENTRIES]
-
-EMBS = MODEL.encode(KB_TEXTS, convert_to_numpy=True)
-# normalize for cosine (use inner product on normalized vectors)
-faiss.normalize_L2(EMBS)
-DIM = EMBS.shape[1]
-INDEX = faiss.IndexFlatIP(DIM)
-INDEX.add(EMBS)
-
-# --- Random Forest Classifier ---
-# train dengan embedding (sebelum normalisasi agar bisa dipakai di classifier)
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
-clf.fit(EMBS, KB_INTENTS)
-
-CLF = clf
\ No newline at end of file
+FALLBACK_KB = [
+    {"text": "Berapa stok truk yang tersedia?", "intent": "check_stock"},
+    {"text": "stok truk masih ada ga", "intent": "check_stock"},
+    {"text": "Berapa harga excavator?", "intent": "ask_price"},
+    {"text": "Saya mau booking buldoser", "intent": "booking"},
+]
+
+def _load_entries(data: bytes = None):
+    # data: isi file KB yang sudah dibaca load_or_build (sama dengan yang di-hash jadi versi)
+    return load_kb(data=data) or FALLBACK_KB
+
+_lock = threading.Lock()
+_model = None
+_encoder = None
+
+def get_model():
+    """Model encoder (backend dari ENCODER_BACKEND: torch / onnx / onnx-int8), dimuat saat pertama dipakai."""
+    global _model, _encoder
+    if _model is None:
+        with _lock:
+            if _model is None:
+                model = load_encoder()
+                # encode query per-request lewat encoder ini supaya request bersamaan digabung jadi satu batch
+                _encoder = BatchingEncoder(model, ENCODER_MAX_BATCH_SIZE, ENCODER_MAX_WAIT_MS) if ENCODER_BATCHING else model
+                _model = model
+    return _model
+
+def get_encoder():
+    get_model()
+    return _encoder
+
+def model_loaded():
+    return _model is not None
+
+# KB aktif (embedding ternormalisasi, index FAISS Flat/HNSW/IVF, classifier linear) dimuat dari artefak
+# per versi KB (memory-mapped); hanya dibangun kalau versi ini belum ada. Dimuat saat startup
+# (app/warmup.py) atau saat KB.current pertama kali dibaca, dan bisa di-reload saat berjalan,
+# jadi selalu baca KB.current (sekali per request), jangan disimpan di global.
+KB = KBManager(get_model, _load_entries)
+
+def encoder_stats():
+    if _encoder is None:
+        return {"loaded": False}
+    if isinstance(_encoder, BatchingEncoder):
+        return _encoder.stats()
+    return {"batching": False}
+
+def kb_index_stats():
+    if not KB.loaded:
+        return {"loaded": False}
+    kb = KB.current
+    return dict(index_stats(kb.index), kb_version=kb.id)
@@ -0,0 +1,211 @@
+"""
+Backend encoder kalimat yang bisa dipilih lewat ENCODER_BACKEND:
+
+- torch     : SentenceTransformer biasa (PyTorch), default
+- onnx      : model yang sudah diekspor ke ONNX, dijalankan dengan ONNX Runtime
+- onnx-int8 : model ONNX yang di-quantize dinamis ke int8 (paling ringan untuk CPU)
+
+Ekspor + validasi model lokal:
+    python -m app.encoders export [--out data/onnx]
+    python -m app.encoders validate --backend onnx-int8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from .config import EMBEDDING_MODEL, ENCODER_BACKEND, ONNX_MODEL_DIR
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+ENCODER_META_FILE = "encoder.json"
+
+
+class OnnxEncoder:
+    """Encoder ONNX Runtime dengan pooling yang sama seperti SentenceTransformer aslinya."""
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, ENCODER_META_FILE)) as f:
+            self.meta = json.load(f)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FILE)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = self.meta.get("max_seq_length", 128)
+        self.pooling = self.meta.get("pooling", "mean")
+        self.normalize = self.meta.get("normalize", False)
+
+    def get_sentence_embedding_dimension(self):
+        return self.meta["dim"]
+
+    def _encode_batch(self, texts):
+        enc = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+        feeds = {name: enc[name].astype(np.int64) for name in self.input_names if name in enc}
+        tokens = self.session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            pooled = tokens[:, 0]
+        else:
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, convert_to_numpy=True, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        out = np.vstack([self._encode_batch(sentences[i:i + batch_size]) for i in range(0, len(sentences), batch_size)])
+        return out[0] if single else out
+
+
+def load_encoder(backend: str = ENCODER_BACKEND, model_name: str = EMBEDDING_MODEL, model_dir: str = ONNX_MODEL_DIR):
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEncoder(model_dir, quantized=backend == "onnx-int8")
+    raise ValueError(f"ENCODER_BACKEND tidak dikenal: {backend!r} (pilihan: {', '.join(BACKENDS)})")
+
+
+def export_onnx(model_name: str = EMBEDDING_MODEL, out_dir: str = ONNX_MODEL_DIR, opset: int = 14):
+    """Ekspor transformer dari SentenceTransformer ke ONNX + versi int8 (quantize dinamis)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    pooling = "mean"
+    normalize = False
+    for module in st:
+        name = type(module).__name__
+        if name == "Pooling" and getattr(module, "pooling_mode_cls_token", False):
+            pooling = "cls"
+        if name == "Normalize":
+            normalize = True
+
+    os.makedirs(out_dir, exist_ok=True)
+    sample = tokenizer(["contoh kalimat untuk ekspor"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic["token_embeddings"] = {0: "batch", 1: "seq"}
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return self.model(**dict(zip(input_names, args)))[0]
+
+    onnx_path = os.path.join(out_dir, ONNX_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(auto_model), tuple(sample[n] for n in input_names), onnx_path,
+            input_names=input_names, output_names=["token_embeddings"],
+            dynamic_axes=dynamic, opset_version=opset,
+        )
+    quantize_dynamic(onnx_path, os.path.join(out_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(out_dir)
+    meta = {
+        "model": model_name,
+        "dim": st.get_sentence_embedding_dimension(),
+        "max_seq_length": st.max_seq_length,
+        "pooling": pooling,
+        "normalize": normalize,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(out_dir, ENCODER_META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+
+def _normalized(X):
+    X = np.asarray(X, dtype=np.float32)
+    return X / np.clip(np.linalg.norm(X, axis=1, keepdims=True), 1e-12, None)
+
+
+def _loo_accuracy(X, labels):
+    # akurasi nearest-neighbour leave-one-out (mirip tier semantic FAISS)
+    S = X @ X.T
+    np.fill_diagonal(S, -np.inf)
+    pred = np.asarray(labels)[S.argmax(axis=1)]
+    return float((pred == np.asarray(labels)).mean())
+
+
+def validate(backend: str, model_dir: str = ONNX_MODEL_DIR, reference: str = "torch", repeat: int = 20):
+    """Bandingkan backend dengan referensi: cosine agreement, selisih akurasi intent, latency."""
+    from .kb_loader import BASE_DIR, load_kb
+
+    entries = load_kb() + load_kb(os.path.join(BASE_DIR, "data", "training_kb_1.csv"))
+    texts = [e["text"] for e in entries]
+    labels = [e["intent"] for e in entries]
+
+    report = {"backend": backend, "reference": reference, "n_texts": len(texts)}
+    encoded = {}
+    for name in (reference, backend):
+        enc = load_encoder(name, model_dir=model_dir)
+        started = time.perf_counter()
+        X = _normalized(enc.encode(texts, convert_to_numpy=True))
+        batch_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for t in texts[:repeat]:
+            enc.encode([t], convert_to_numpy=True)
+        single_ms = (time.perf_counter() - started) / max(1, min(repeat, len(texts))) * 1000.0
+        encoded[name] = X
+        report[name] = {
+            "batch_encode_s": round(batch_s, 4),
+            "single_encode_ms": round(single_ms, 3),
+            "loo_intent_accuracy": round(_loo_accuracy(X, labels), 4),
+        }
+
+    cos = (encoded[reference] * encoded[backend]).sum(axis=1)
+    report["cosine"] = {
+        "mean": round(float(cos.mean()), 5),
+        "min": round(float(cos.min()), 5),
+        "p05": round(float(np.percentile(cos, 5)), 5),
+    }
+    report["intent_accuracy_delta"] = round(
+        report[backend]["loo_intent_accuracy"] - report[reference]["loo_intent_accuracy"], 4
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor & validasi backend encoder")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export")
+    exp.add_argument("--model", default=EMBEDDING_MODEL)
+    exp.add_argument("--out", default=ONNX_MODEL_DIR)
+    exp.add_argument("--opset", type=int, default=14)
+    val = sub.add_parser("validate")
+    val.add_argument("--backend", default="onnx-int8", choices=BACKENDS)
+    val.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    val.add_argument("--min-cosine", type=float, default=0.98, help="gagal kalau rata-rata cosine di bawah ini")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "export":
+        out = export_onnx(args.model, args.out, args.opset)
+        print(f"model ONNX ditulis ke {out}")
+        report = validate("onnx-int8", out)
+    else:
+        report = validate(args.backend, args.model_dir)
+    print(json.dumps(report, indent=2))
+    return 0 if report["cosine"]["mean"] >= getattr(args, "min_cosine", 0.98) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Evaluasi offline cascade intent (keyword -> FAISS -> classifier linear) dengan stratified k-fold.
+
+    python -m app.evaluation [--kb data/training_kb.csv --kb data/training_kb_1.csv] [--folds 5] [--out eval.json]
+
+Per fold: index FAISS + classifier dibangun dari data train (cara yang sama dengan kb_artifacts),
+lalu setiap kalimat test dijalankan lewat cascade seperti _recognize_intent. Embedding semua kalimat
+dihitung dengan satu encode batch (embedding tidak tergantung fold), jadi biaya per fold hanya
+build index/classifier + pencarian.
+
+Laporan: akurasi, macro-F1 dan confusion matrix per tier (untuk kalimat yang dijawab tier itu) dan
+untuk cascade keseluruhan, porsi trafik per tier, latency mean/p95 per tier, akurasi tiap tier bila
+dipakai sendiri, serta sweep threshold semantic (0.55) dan classifier (0.6) beserta perkiraan
+latency per query.
+"""
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
+from sklearn.model_selection import StratifiedKFold
+from .kb_loader import CSV_PATH, load_kb
+from .kb_artifacts import encode_texts
+from .vector_index import build_index
+from .intent_recognizer import keyword_intent
+from .linear_classifier import LinearIntentClassifier, CLASSIFIER_TYPES
+from .config import CLASSIFIER_TYPE
+
+UNKNOWN = "unknown"
+SEMANTIC_THRESHOLD = 0.55
+CLF_THRESHOLD = 0.6
+
+
+def load_entries(paths):
+    """Gabungan beberapa file KB; kalimat yang sama (teks + intent) cukup sekali."""
+    seen, entries = set(), []
+    for path in paths:
+        for e in load_kb(path):
+            key = (e["text"], e["intent"])
+            if key not in seen:
+                seen.add(key)
+                entries.append(e)
+    return entries
+
+
+def latency(samples_ms):
+    if not samples_ms:
+        return {"count": 0, "mean_ms": None, "p95_ms": None}
+    arr = np.asarray(samples_ms)
+    return {"count": int(arr.size), "mean_ms": round(float(arr.mean()), 4),
+            "p95_ms": round(float(np.percentile(arr, 95)), 4)}
+
+
+def classification(y_true, y_pred, labels):
+    if not y_true:
+        return {"count": 0}
+    return {
+        "count": len(y_true),
+        "accuracy": round(float(accuracy_score(y_true, y_pred)), 4),
+        "macro_f1": round(float(f1_score(y_true, y_pred, labels=labels, average="macro", zero_division=0)), 4),
+        "labels": labels,
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=labels).tolist(),
+    }
+
+
+def run_fold(texts, intents, embs, train, test, timings, kind=CLASSIFIER_TYPE):
+    """Jalankan kalimat test lewat cascade; hasil per kalimat: skor tiap tier untuk sweep threshold."""
+    index = build_index(np.ascontiguousarray(embs[train]))
+    train_intents = [intents[i] for i in train]
+    clf = LinearIntentClassifier.fit(embs[train], train_intents, kind)
+
+    rows = []
+    for i in test:
+        t0 = time.perf_counter()
+        kw = keyword_intent(texts[i])
+        timings["keyword"].append((time.perf_counter() - t0) * 1000.0)
+
+        v = embs[i:i + 1]
+        t0 = time.perf_counter()
+        D, I = index.search(v, 3)
+        timings["semantic"].append((time.perf_counter() - t0) * 1000.0)
+        best = int(I[0][0])
+
+        t0 = time.perf_counter()
+        proba = clf.predict_proba(v)[0]
+        timings["classifier"].append((time.perf_counter() - t0) * 1000.0)
+
+        rows.append({
+            "gold": intents[i],
+            "keyword": kw,
+            "sem_intent": train_intents[best] if best != -1 else None,
+            "sem_score": float(D[0][0]) if best != -1 else None,
+            "clf_intent": str(clf.classes_[proba.argmax()]),
+            "clf_score": float(proba.max()),
+        })
+    return rows
+
+
+def cascade(row, sem_threshold=SEMANTIC_THRESHOLD, clf_threshold=CLF_THRESHOLD, clf_on_low=False):
+    """
+    (tier, intent) seperti _recognize_intent/_decide. Cascade sekarang: classifier hanya dipakai kalau
+    FAISS tidak mengembalikan hasil sama sekali; clf_on_low=True mencoba varian di mana skor semantic di
+    bawah threshold diteruskan ke classifier.
+    """
+    if row["keyword"]:
+        return "keyword", row["keyword"]
+    if row["sem_intent"] is not None:
+        if row["sem_score"] >= sem_threshold:
+            return "semantic", row["sem_intent"]
+        if not clf_on_low:
+            return "semantic_low", UNKNOWN
+    if row["clf_score"] >= clf_threshold:
+        return "classifier", row["clf_intent"]
+    return "classifier_low", UNKNOWN
+
+
+def evaluate_cascade(rows, labels, cost, **kwargs):
+    decided = [cascade(r, **kwargs) for r in rows]
+    gold = [r["gold"] for r in rows]
+    pred = [p for _, p in decided]
+    tiers = {}
+    for name in ("keyword", "semantic", "semantic_low", "classifier", "classifier_low"):
+        idx = [k for k, (tier, _) in enumerate(decided) if tier == name]
+        if idx:
+            tiers[name] = dict(share=round(len(idx) / len(rows), 4),
+                               **classification([gold[k] for k in idx], [pred[k] for k in idx], labels + [UNKNOWN]))
+    answered = [k for k, p in enumerate(pred) if p != UNKNOWN]
+    # perkiraan biaya per query: keyword selalu; encode + search kalau keyword gagal; classifier kalau sampai ke sana
+    est = sum(cost["keyword"] + (cost["encode"] + cost["semantic"] if tier != "keyword" else 0.0)
+              + (cost["classifier"] if tier.startswith("classifier") else 0.0) for tier, _ in decided)
+    return {
+        "overall": classification(gold, pred, labels + [UNKNOWN]),
+        "coverage": round(len(answered) / len(rows), 4),
+        "precision_answered": round(sum(gold[k] == pred[k] for k in answered) / len(answered), 4) if answered else None,
+        "tiers": tiers,
+        "est_mean_ms": round(est / len(rows), 4),
+    }
+
+
+def sweep(rows, labels, cost, sem_thresholds, clf_thresholds):
+    out = []
+    for s in sem_thresholds:
+        r = evaluate_cascade(rows, labels, cost, sem_threshold=s)
+        out.append({"variant": "current", "sem_threshold": s, "clf_threshold": None,
+                    **{k: r[k] for k in ("coverage", "precision_answered", "est_mean_ms")},
+                    "accuracy": r["overall"]["accuracy"], "macro_f1": r["overall"]["macro_f1"]})
+        for t in clf_thresholds:
+            r = evaluate_cascade(rows, labels, cost, sem_threshold=s, clf_threshold=t, clf_on_low=True)
+            out.append({"variant": "clf_on_low", "sem_threshold": s, "clf_threshold": t,
+                        **{k: r[k] for k in ("coverage", "precision_answered", "est_mean_ms")},
+                        "accuracy": r["overall"]["accuracy"], "macro_f1": r["overall"]["macro_f1"]})
+    return out
+
+
+def encode_latency(model, texts, n: int):
+    samples = []
+    for t in texts[:n]:
+        t0 = time.perf_counter()
+        model.encode([t], convert_to_numpy=True)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return latency(samples)
+
+
+def floats(value: str):
+    return [float(x) for x in value.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", action="append", help="file KB (boleh berulang; default data/training_kb.csv)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sem-thresholds", type=floats, default=floats("0.45,0.5,0.55,0.6,0.65,0.7"))
+    parser.add_argument("--clf-thresholds", type=floats, default=floats("0.4,0.5,0.6,0.7"))
+    parser.add_argument("--classifier", choices=CLASSIFIER_TYPES, default=CLASSIFIER_TYPE)
+    parser.add_argument("--latency-samples", type=int, default=50, help="jumlah encode satu kalimat untuk latency")
+    parser.add_argument("--out", default=None, help="tulis JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    from .encoders import load_encoder
+
+    entries = load_entries(args.kb or [CSV_PATH])
+    if not entries:
+        print("KB kosong", file=sys.stderr)
+        return 1
+    texts = [e["text"] for e in entries]
+    intents = [e["intent"] for e in entries]
+    labels = sorted(set(intents))
+    counts = {k: intents.count(k) for k in labels}
+    folds = max(2, min(args.folds, max(counts.values())))
+
+    model = load_encoder()
+    t0 = time.perf_counter()
+    embs, _ = encode_texts(model, texts)
+    encode_batch_s = time.perf_counter() - t0
+
+    timings = {"keyword": [], "semantic": [], "classifier": []}
+    rows = []
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=args.seed)
+    for train, test in skf.split(texts, intents):
+        rows.extend(run_fold(texts, intents, embs, train, test, timings, args.classifier))
+
+    tier_latency = {name: latency(v) for name, v in timings.items()}
+    tier_latency["encode"] = encode_latency(model, texts, args.latency_samples)
+    cost = {name: tier_latency[name]["mean_ms"] or 0.0 for name in tier_latency}
+    gold = [r["gold"] for r in rows]
+
+    report = {
+        "config": dict(vars(args), folds=folds),
+        "entries": len(entries),
+        "class_counts": counts,
+        "encode_batch_s": round(encode_batch_s, 3),
+        "cascade": evaluate_cascade(rows, labels, cost),
+        "latency": tier_latency,
+        # akurasi tiap tier kalau dipakai sendiri untuk semua kalimat (keyword: hanya yang cocok)
+        "standalone": {
+            "keyword": classification([r["gold"] for r in rows if r["keyword"]],
+                                      [r["keyword"] for r in rows if r["keyword"]], labels),
+            "semantic_top1": classification(gold, [r["sem_intent"] or UNKNOWN for r in rows], labels + [UNKNOWN]),
+            "classifier": classification(gold, [r["clf_intent"] for r in rows], labels),
+        },
+        "sweep": sweep(rows, labels, cost, args.sem_thresholds, args.clf_thresholds),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
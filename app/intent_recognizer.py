@@ -1,15 +1,13 @@
-from .embeddings import MODEL, INDEX, KB_INTENTS, KB_TEXTS, CLF
+from .embeddings import KB, get_model, get_encoder
 import faiss
 import numpy as np
-import re
-from rapidfuzz import fuzz
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
+import time
+from .keyword_matcher import KeywordMatcher
+from .cache import LRUCache
+from .metrics import stage, observe_intent
+from .message import normalize, parse
+from .services.admission import INFERENCE, INFERENCE_POOL, Overloaded
+from .config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS, ADMISSION_MODE
 
 
 
@@ -71,184 +69,207 @@ PRICE_SEWA_PATTERNS = [
     "berapa sewa", "sewa berapa", "biaya sewa", "tarif sewa", "harga sewa"
 ]
 
-def normalize_repeated_chars(text: str) -> str:
-    # Ganti huruf berulang 2x+ menjadi satu huruf
-    return re.sub(r'(.)\1{2,}', r'\1', text)
-
-def preprocess(text: str) -> str:
-    t = text.lower().strip()
-    t = re.sub(r"[^0-9a-zA-Z\u00C0-\u017F\s]", " ", t)
-    t = normalize_repeated_chars(t)
-    t = re.sub(r"\s+", " ", t)
-    return t
-
-def semantic_match(text: str, top_k: int = 3):
-    v = MODEL.encode([text], convert_to_numpy=True)
-    faiss.normalize_L2(v)
-    D, I = INDEX.search(v, top_k)
+# Urutan = prioritas: price_sewa dicek dulu (supaya "berapa sewa" tidak nyangkut di booking),
+# lalu ask_price, booking, baru intent lain seperti stok, closing, dsb.
+KEYWORD_MATCHER = KeywordMatcher([
+    ("price_sewa", PRICE_SEWA_PATTERNS, 80, None),
+    ("ask_price", PRICE_KEYWORDS, 80, None),
+    ("booking", BOOKING_KEYWORDS, 80, None),
+    ("check_stock", STOCK_KEYWORDS, 80, None),
+    ("closing_keyword", CLOSING_KEYWORDS, 80, None),
+    ("closing_confirmation", CLOSING_CONFIRMATION_KEYWORDS, 90, 2),
+    ("complaint_keyword", COMPLAINT_KEYWORDS, 80, None),
+    ("greeting", GREETING_KEYWORDS, 90, 2),
+])
+
+# normalisasi yang sama dengan lookup katalog (lihat app/message.py)
+preprocess = normalize
+
+# embedding query tidak tergantung isi KB, jadi tetap berlaku setelah reload KB;
+# key cache intent menyertakan versi KB supaya tidak terpakai lagi kalau KB/index berubah
+EMBEDDING_CACHE = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+INTENT_CACHE = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+# hasil intent versi lama tidak akan terpakai lagi, langsung dibuang saat versi KB berganti
+KB.add_listener(lambda old, new: INTENT_CACHE.clear())
+
+def encode_query(t: str):
+    """Embedding ternormalisasi untuk teks yang sudah di-preprocess (dari cache kalau ada)."""
+    v = EMBEDDING_CACHE.get(t)
+    if v is None:
+        with stage("encode"):
+            v = get_encoder().encode([t], convert_to_numpy=True)
+        faiss.normalize_L2(v)
+        v.flags.writeable = False
+        EMBEDDING_CACHE.put(t, v)
+    return v
+
+def encode_queries(ts):
+    """Versi batch encode_query: teks yang belum ada di cache di-encode dalam satu panggilan model."""
+    vecs = [EMBEDDING_CACHE.get(t) for t in ts]
+    missing = list(dict.fromkeys(t for t, v in zip(ts, vecs) if v is None))
+    if missing:
+        # sudah berupa batch, langsung ke model tanpa lewat micro-batcher
+        with stage("encode_batch"):
+            M = get_model().encode(missing, convert_to_numpy=True).astype(np.float32, copy=False)
+        faiss.normalize_L2(M)
+        fresh = {}
+        for t, row in zip(missing, M):
+            v = row.reshape(1, -1).copy()
+            v.flags.writeable = False
+            EMBEDDING_CACHE.put(t, v)
+            fresh[t] = v
+        vecs = [v if v is not None else fresh[t] for t, v in zip(ts, vecs)]
+    return np.vstack(vecs) if vecs else np.empty((0, KB.current.index.d), dtype=np.float32)
+
+def _semantic_results(kb, scores, idxs):
     results = []
-    for score, idx in zip(D[0], I[0]):
+    for score, idx in zip(scores, idxs):
         if idx == -1:
             continue
-        results.append({"score": float(score), "intent": KB_INTENTS[idx], "example": KB_TEXTS[idx]})
+        results.append({"score": float(score), "intent": kb.intents[idx], "example": kb.texts[idx]})
     return results
 
-def recognize_intent(text: str, threshold: float = 0.55):
+def semantic_match(text, top_k: int = 3, kb=None):
+    kb = kb or KB.current
+    v = encode_query(parse(text).text)
+    with stage("faiss_search"):
+        D, I = kb.index.search(v, top_k)
+    return _semantic_results(kb, D[0], I[0])
+
+def recognize_intent(text, threshold: float = 0.55):
+    """text: ParsedMessage (atau teks mentah, di-parse di sini)."""
+    # versi KB diambil sekali; reload di tengah jalan tidak mempengaruhi request ini
+    kb = KB.current
+    msg = parse(text)
+    key = (kb.id, msg.text, threshold)
+    cached = INTENT_CACHE.get(key)
+    if cached is None:
+        started = time.perf_counter()
+        cached = _remember(kb, key, _recognize_intent(kb, msg, threshold), started)
+    else:
+        observe_intent("cache", 0.0)
+    return dict(cached)
+
+async def recognize_intent_async(text, threshold: float = 0.55):
+    """
+    recognize_intent untuk endpoint async: cache dan keyword dijawab langsung di event loop,
+    hanya tier semantic + classifier (encode, FAISS) yang dijalankan di INFERENCE_POOL.
+    """
+    kb = KB.current
+    msg = parse(text)
+    key = (kb.id, msg.text, threshold)
+    cached = INTENT_CACHE.get(key)
+    if cached is not None:
+        observe_intent("cache", 0.0)
+        return dict(cached)
+    started = time.perf_counter()
+    with stage("keyword_intent"):
+        kw = keyword_intent(msg)
+    if kw:
+        result = {"intent": kw, "source": "keyword", "score": 1.0}
+    else:
+        try:
+            result = await INFERENCE_POOL.run(_model_intent, kb, msg, threshold)
+        except Overloaded:
+            if ADMISSION_MODE == "reject":
+                raise
+            result = _degraded()
+    return dict(_remember(kb, key, result, started))
+
+def _remember(kb, key, result, started):
+    result["kb_version"] = kb.id
+    observe_intent(result["source"], time.perf_counter() - started)
+    if result["source"] != "degraded":
+        INTENT_CACHE.put(key, result)
+    return result
+
+def recognize_intents(texts, threshold: float = 0.55):
+    """
+    recognize_intent untuk banyak teks sekaligus: keyword dulu untuk semua, sisanya di-encode
+    dalam satu batch dan dicari dengan satu index.search. Hasil sama dengan recognize_intent per teks.
+    """
+    kb = KB.current
+    msgs = [parse(t) for t in texts]
+    norm = [m.text for m in msgs]
+    results = [INTENT_CACHE.get((kb.id, t, threshold)) for t in norm]
+    todo = []
+    for i, (msg, r) in enumerate(zip(msgs, results)):
+        if r is not None:
+            continue
+        kw = keyword_intent(msg)
+        if kw:
+            results[i] = {"intent": kw, "source": "keyword", "score": 1.0}
+        else:
+            todo.append(i)
+
+    if todo:
+        try:
+            # satu slot untuk seluruh batch (sudah satu panggilan encode + search)
+            with INFERENCE.slot():
+                V = encode_queries([norm[i] for i in todo])
+                with stage("faiss_search_batch"):
+                    D, I = kb.index.search(V, 3)
+                for row, i in enumerate(todo):
+                    sem = _semantic_results(kb, D[row], I[row])
+                    results[i] = _decide(kb, sem, V[row:row + 1], threshold)
+        except Overloaded:
+            if ADMISSION_MODE == "reject":
+                raise
+            for i in todo:
+                results[i] = _degraded()
+
+    for t, r in zip(norm, results):
+        r["kb_version"] = kb.id
+        if r["source"] != "degraded":
+            INTENT_CACHE.put((kb.id, t, threshold), r)
+    return [dict(r) for r in results]
+
+def _recognize_intent(kb, msg, threshold: float):
     # 1) keyword (fast)
-    kw = keyword_intent(text)
+    with stage("keyword_intent"):
+        kw = keyword_intent(msg)
     if kw:
         return {"intent": kw, "source": "keyword", "score": 1.0}
-
-    # 2) semantic (FAISS)
-    sem = semantic_match(text, top_k=3)
+    return _model_intent(kb, msg, threshold)
+
+def _model_intent(kb, msg, threshold: float):
+    # 2) + 3) tier berat dibatasi admission control; kalau penuh, cukup hasil keyword (tidak ada)
+    try:
+        with INFERENCE.slot():
+            # 2) semantic (FAISS)
+            sem = semantic_match(msg, top_k=3, kb=kb)
+            # 3) classifier linear (pakai embedding yang sama dengan tier semantic, dari cache)
+            return _decide(kb, sem, None if sem else encode_query(msg.text), threshold)
+    except Overloaded:
+        if ADMISSION_MODE == "reject":
+            raise
+        return _degraded()
+
+def _degraded():
+    # tidak di-cache: begitu beban turun, teks yang sama dinilai lagi lewat tier semantic
+    return {"intent": "unknown", "source": "degraded", "score": 0.0}
+
+def _decide(kb, sem, X, threshold: float):
     if sem:
         best = sem[0]
         if best["score"] >= threshold:
             return {"intent": best["intent"], "source": "semantic", "score": best["score"]}
         return {"intent": "unknown", "source": "semantic_low", "score": best["score"]}
 
-    # 3) random forest
-    X = MODEL.encode([text])
-    proba = CLF.predict_proba(X)[0]
+    with stage("classifier"):
+        proba = kb.clf.predict_proba(X)[0]
     max_proba = float(proba.max())
-    pred_int = CLF.classes_[proba.argmax()]
+    pred_int = str(kb.clf.classes_[proba.argmax()])
 
     if max_proba >= 0.6:  # set threshold 0.6
-        return {"intent": pred_int, "source": "random_forest", "score": max_proba}
+        return {"intent": pred_int, "source": "classifier", "score": max_proba}
     else:
-        return {"intent": "unknown", "source": "random_forest_low", "score": max_proba}
-
-
-def keyword_intent(text: str):
-    t = preprocess(text)
-    words = t.split()
-
-    # 1️⃣ Cek price_sewa dulu (supaya "berapa sewa" tidak nyangkut di booking)
-    for w in words:
-        for kw in PRICE_SEWA_PATTERNS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "price_sewa"
-
-    for kw in PRICE_SEWA_PATTERNS:
-        if kw in t:
-            return "price_sewa"
-
-    # 2️⃣ Baru cek ask_price biasa
-    for w in words:
-        for kw in PRICE_KEYWORDS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "ask_price"
-    for kw in PRICE_KEYWORDS:
-        if kw in t:
-            return "ask_price"
-
-    # 3️⃣ Lalu cek booking
-    for w in words:
-        for kw in BOOKING_KEYWORDS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "booking"
-    for kw in BOOKING_KEYWORDS:
-        if kw in t:
-            return "booking"
-
-    # 4️⃣ Sisanya cek intent lain seperti stok, closing, dsb
-    for w in words:
-        for kw in STOCK_KEYWORDS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "check_stock"
-    for kw in STOCK_KEYWORDS:
-        if kw in t:
-            return "check_stock"
-
-    for w in words:
-        for kw in CLOSING_KEYWORDS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "closing_keyword"
-    for kw in CLOSING_KEYWORDS:
-        if kw in t:
-            return "closing_keyword"
-
-    for w in words:
-        for kw in CLOSING_CONFIRMATION_KEYWORDS:
-            if abs(len(w) - len(kw)) <= 2 and fuzz.ratio(w, kw) >= 90:
-                return "closing_confirmation"
-
-    for kw in CLOSING_CONFIRMATION_KEYWORDS:
-        if kw in t:  # exact substring match
-            return "closing_confirmation"        
-
-    for w in words:
-        for kw in COMPLAINT_KEYWORDS:
-            if fuzz.ratio(w, kw) >= 80:
-                return "complaint_keyword"
-    for kw in COMPLAINT_KEYWORDS:
-        if kw in t:
-            return "complaint_keyword"
-
-    for w in words:
-        for kw in GREETING_KEYWORDS:
-            if abs(len(w) - len(kw)) <= 2 and fuzz.ratio(w, kw) >= 90:
-                return "greeting"
-
-    for kw in GREETING_KEYWORDS:
-        if kw in t:  # exact substring match
-            return "greeting"
-
-    return None
-
-def plot_rf_boundary():
-    # --- 1. Encode teks ke embedding ---
-    X = MODEL.encode(KB_TEXTS)
-    y = KB_INTENTS
-
-    # --- 2. Encode label ke angka ---
-    le = LabelEncoder()
-    y_enc = le.fit_transform(y)
-
-    # --- 3. Reduksi dimensi ke 2D (biar bisa diplot) ---
-    pca = PCA(n_components=2)
-    X_2d = pca.fit_transform(X)
-
-    # --- 4. Train RandomForest di data 2D ---
-    rf = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf.fit(X_2d, y_enc)
-
-    # --- 5. Evaluasi model ---
-    y_pred = rf.predict(X_2d)
-
-    acc = accuracy_score(y_enc, y_pred)
-    prec = precision_score(y_enc, y_pred, average="weighted", zero_division=0)
-    rec = recall_score(y_enc, y_pred, average="weighted", zero_division=0)
-    f1 = f1_score(y_enc, y_pred, average="weighted", zero_division=0)
-    cm = confusion_matrix(y_enc, y_pred)
-
-    # print("\n📊 Evaluasi RandomForest (PCA 2D):")
-    # print(f"Accuracy : {acc:.2f}")
-    # print(f"Precision: {prec:.2f}")
-    # print(f"Recall   : {rec:.2f}")
-    # print(f"F1-Score : {f1:.2f}")
-    # print("\nConfusion Matrix:")
-    # print(cm)
-    # print("\nClassification Report:")
-    # print(classification_report(y_enc, y_pred, target_names=le.classes_))
-
-    # --- 6. Plot decision boundary ---
-    x_min, x_max = X_2d[:, 0].min() - 1, X_2d[:, 0].max() + 1
-    y_min, y_max = X_2d[:, 1].min() - 1, X_2d[:, 1].max() + 1
-    xx, yy = np.meshgrid(np.linspace(x_min, x_max, 300),
-                         np.linspace(y_min, y_max, 300))
-
-    Z = rf.predict(np.c_[xx.ravel(), yy.ravel()])
-    Z = Z.reshape(xx.shape)
-
-    plt.contourf(xx, yy, Z, alpha=0.3, cmap="tab10")
-    scatter = plt.scatter(X_2d[:, 0], X_2d[:, 1], c=y_enc, s=60, edgecolor="k", cmap="tab10")
-
-    handles, _ = scatter.legend_elements()
-    plt.legend(handles, le.classes_, title="Intent")
-
-    plt.title("Decision Boundary - Random Forest (PCA 2D)")
-    plt.xlabel("PC1")
-    plt.ylabel("PC2")
-    plt.savefig("rf_boundary2.png")
-    plt.close()
\ No newline at end of file
+        return {"intent": "unknown", "source": "classifier_low", "score": max_proba}
+
+def query_cache_stats():
+    return {"embeddings": EMBEDDING_CACHE.stats(), "intents": INTENT_CACHE.stats()}
+
+
+def keyword_intent(text):
+    msg = parse(text)
+    return KEYWORD_MATCHER.match(msg.text, msg.tokens)
@@ -0,0 +1,199 @@
+"""
+Artefak KB yang sudah jadi (embedding ternormalisasi, index FAISS, bobot classifier) disimpan per versi
+di KB_ARTIFACTS_DIR/<versi>/, versi = hash isi KB + nama model embedding + konfigurasi index + jenis classifier.
+Worker cukup memuat (memory-map) artefak ini saat start, tidak perlu encode ulang seluruh KB.
+
+Build manual (mis. saat deploy):
+    python -m app.kb_artifacts build [--force]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import fcntl
+import hashlib
+import argparse
+import logging
+import numpy as np
+import faiss
+from .kb_loader import CSV_PATH, kb_hash, read_kb
+from .config import EMBEDDING_MODEL, ENCODER_BACKEND, KB_ARTIFACTS_DIR, CLASSIFIER_TYPE, INDEX_STORAGE
+from .vector_index import build_index, configure_search, index_kind, index_spec, index_storage
+from .linear_classifier import LinearIntentClassifier
+
+# embedding tiap backend sedikit berbeda, jadi backend ikut menentukan versi artefak
+ENCODER_ID = f"{EMBEDDING_MODEL}:{ENCODER_BACKEND}"
+
+logger = logging.getLogger(__name__)
+
+EMBS_FILE = "embs.npy"
+INDEX_FILE = "index.faiss"
+CLF_FILE = "clf.npy"
+META_FILE = "meta.json"
+
+
+def artifact_version(kb_path: str = CSV_PATH, model_name: str = ENCODER_ID, data: bytes = None) -> str:
+    # efSearch / nprobe tidak ikut: itu diatur saat load
+    h = hashlib.sha256(f"{kb_hash(kb_path, data)}:{model_name}:{index_spec()}:{CLASSIFIER_TYPE}".encode())
+    return h.hexdigest()[:16]
+
+
+def artifact_path(version: str, root: str = KB_ARTIFACTS_DIR) -> str:
+    return os.path.join(root, version)
+
+
+def encode_texts(model, texts, reuse=None):
+    """
+    Embedding ternormalisasi untuk texts. `reuse` (teks -> vektor ternormalisasi, mis. dari versi KB
+    sebelumnya) dipakai untuk teks yang sudah pernah di-encode; hanya teks baru/berubah yang di-encode.
+    """
+    reuse = reuse or {}
+    missing = [t for t in dict.fromkeys(texts) if t not in reuse]
+    fresh = {}
+    if missing:
+        M = np.ascontiguousarray(model.encode(missing, convert_to_numpy=True), dtype=np.float32)
+        # normalize for cosine (use inner product on normalized vectors)
+        faiss.normalize_L2(M)
+        fresh = dict(zip(missing, M))
+    embs = np.ascontiguousarray([fresh[t] if t in fresh else reuse[t] for t in texts], dtype=np.float32)
+    return embs, len(missing)
+
+
+def build_artifacts(model, entries, version: str, root: str = KB_ARTIFACTS_DIR, model_name: str = ENCODER_ID,
+                    reuse=None):
+    """Encode KB, bangun index + classifier, tulis ke direktori versi secara atomik."""
+    texts = [e["text"] for e in entries]
+    intents = [e["intent"] for e in entries]
+
+    started = time.time()
+    embs, encoded = encode_texts(model, texts, reuse)
+    index = build_index(embs)
+
+    # classifier linear (centroid / logistic regression) di atas embedding yang sama, satu array bobot
+    clf = LinearIntentClassifier.fit(embs, intents, CLASSIFIER_TYPE)
+
+    os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f".{version}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    dim = int(embs.shape[1])
+    # index terkompresi: salinan embedding (hanya diagnostik, tidak dipakai ulang saat reload) cukup float16,
+    # matriks float32 tidak disimpan / dipertahankan setelah index & classifier jadi
+    if INDEX_STORAGE != "float32":
+        embs = embs.astype(np.float16)
+    np.save(os.path.join(tmp, EMBS_FILE), embs)
+    del embs
+    faiss.write_index(index, os.path.join(tmp, INDEX_FILE))
+    np.save(os.path.join(tmp, CLF_FILE), clf.weights)
+    meta = {
+        "version": version,
+        "model": model_name,
+        "dim": dim,
+        "count": len(texts),
+        "encoded": encoded,
+        "index": index_kind(index),
+        "storage": index_storage(index),
+        "classifier": clf.meta(),
+        "texts": texts,
+        "intents": intents,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": round(time.time() - started, 3),
+    }
+    with open(os.path.join(tmp, META_FILE), "w") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    final = artifact_path(version, root)
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # sudah dibangun proses lain
+        shutil.rmtree(tmp, ignore_errors=True)
+    return final
+
+
+def load_artifacts(version: str, root: str = KB_ARTIFACTS_DIR):
+    """Muat artefak dengan memory-map supaya halaman memorinya dibagi antar worker. None kalau belum ada."""
+    path = artifact_path(version, root)
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    embs = np.load(os.path.join(path, EMBS_FILE), mmap_mode="r")
+    index_path = os.path.join(path, INDEX_FILE)
+    try:
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        index = faiss.read_index(index_path)
+    configure_search(index)
+    info = meta["classifier"]
+    clf = LinearIntentClassifier(info["classes"], np.load(os.path.join(path, CLF_FILE), mmap_mode="r"),
+                                 info["kind"], info["temperature"])
+    return {
+        "version": version,
+        "path": path,
+        "meta": meta,
+        "texts": meta["texts"],
+        "intents": meta["intents"],
+        "embs": embs,
+        "index": index,
+        "clf": clf,
+    }
+
+
+def load_or_build(get_model, load_entries, kb_path: str = CSV_PATH, root: str = KB_ARTIFACTS_DIR,
+                  model_name: str = ENCODER_ID, reuse=None):
+    """
+    Pakai artefak versi sekarang kalau ada; kalau belum, satu worker membangun, yang lain menunggu.
+    File KB dibaca sekali: versi dihitung dan load_entries(data) mem-parsing bytes yang sama, jadi file
+    yang berubah di tengah build tidak tersimpan di bawah versi lama.
+    """
+    data = read_kb(kb_path)
+    version = artifact_version(kb_path, model_name, data)
+    art = load_artifacts(version, root)
+    if art is not None:
+        return art
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".build.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        art = load_artifacts(version, root)
+        if art is None:
+            logger.info("membangun artefak KB versi %s", version)
+            build_artifacts(get_model(), load_entries(data), version, root, model_name, reuse)
+            art = load_artifacts(version, root)
+            art["built"] = True
+    return art
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun artefak embedding/index/classifier KB")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--kb", default=CSV_PATH)
+    build.add_argument("--out", default=KB_ARTIFACTS_DIR)
+    build.add_argument("--force", action="store_true", help="bangun ulang walau versi sudah ada")
+    args = parser.parse_args(argv)
+
+    from .encoders import load_encoder
+    from .kb_loader import load_kb
+
+    data = read_kb(args.kb)
+    version = artifact_version(args.kb, data=data)
+    path = artifact_path(version, args.out)
+    if os.path.exists(path) and not args.force:
+        print(f"artefak versi {version} sudah ada: {path}")
+        return 0
+    shutil.rmtree(path, ignore_errors=True)
+    entries = load_kb(args.kb, data)
+    if not entries:
+        print(f"KB kosong: {args.kb}", file=sys.stderr)
+        return 1
+    path = build_artifacts(load_encoder(), entries, version, args.out)
+    print(f"artefak versi {version} ditulis ke {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,33 @@
+import io
 import os
-import pandas as pd
+import hashlib
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CSV_PATH = os.path.join(BASE_DIR, "data", "training_kb.csv")
 
-def load_kb(path: str = CSV_PATH):
-    items = []
+def read_kb(path: str = CSV_PATH) -> bytes:
+    """Isi mentah file KB (b"" kalau tidak ada). Hash versi & parsing memakai bytes yang sama."""
     if not os.path.exists(path):
+        return b""
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_kb(path: str = CSV_PATH, data: bytes = None):
+    """Entri KB dari file, atau dari `data` (hasil read_kb) supaya isinya pasti sama dengan yang di-hash."""
+    items = []
+    if data is None:
+        data = read_kb(path)
+    if not data:
         return items
-    df = pd.read_csv(path)
+    import pandas as pd  # berat (~0.2 detik), hanya perlu saat membangun artefak KB
+    df = pd.read_csv(io.BytesIO(data))
     for _, row in df.iterrows():
         q = str(row.get("question", "")).strip()
         intent = str(row.get("intent", "")).strip()
         if q and intent:
             items.append({"text": q, "intent": intent})
     return items
+
+def kb_hash(path: str = CSV_PATH, data: bytes = None) -> str:
+    """Hash isi file KB (atau `data` dari read_kb), dipakai sebagai versi KB."""
+    return hashlib.sha256(read_kb(path) if data is None else data).hexdigest()[:16]
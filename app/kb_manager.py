@@ -0,0 +1,182 @@
+"""
+KB aktif sebagai versi immutable (teks, intent, embedding, index FAISS, classifier) yang bisa
+diganti saat proses berjalan, tanpa restart worker.
+
+- Perubahan terdeteksi lewat polling file KB (KB_WATCH_SECONDS) atau endpoint admin.
+- Versi baru dibangun di thread watcher / admin, bukan di request chat; embedding baris yang
+  teksnya tidak berubah dipakai ulang, hanya baris baru/berubah yang di-encode. Dengan
+  INDEX_STORAGE selain float32 salinan embedding hanya float16, jadi semua baris di-encode ulang.
+- Pergantian versi = satu assignment referensi. Request yang sedang berjalan sudah memegang
+  versi lama (KB.current diambil sekali per request) dan selesai dengan versi itu.
+
+Tiap worker uvicorn punya watcher sendiri; build dikunci per versi di kb_artifacts, jadi hanya
+satu worker yang meng-encode, worker lain tinggal memuat hasilnya.
+"""
+import os
+import time
+import logging
+import threading
+from collections import namedtuple
+import numpy as np
+from .kb_loader import CSV_PATH
+from .kb_artifacts import ENCODER_ID, artifact_version, load_or_build
+from .config import KB_ARTIFACTS_DIR, KB_WATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+KBVersion = namedtuple("KBVersion", ["id", "texts", "intents", "embs", "index", "clf", "meta", "loaded_at"])
+
+
+def _from_artifacts(art):
+    return KBVersion(
+        id=art["version"],
+        texts=tuple(art["texts"]),
+        intents=tuple(art["intents"]),
+        embs=art["embs"],
+        index=art["index"],
+        clf=art["clf"],
+        meta=art["meta"],
+        loaded_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class KBManager:
+    def __init__(self, get_model, load_entries, kb_path: str = CSV_PATH, root: str = KB_ARTIFACTS_DIR,
+                 model_name: str = ENCODER_ID, watch_seconds: float = KB_WATCH_SECONDS):
+        self.get_model = get_model
+        # load_entries(data): entri KB dari isi file yang sudah dibaca load_or_build (bytes yang di-hash)
+        self.load_entries = load_entries
+        self.kb_path = kb_path
+        self.root = root
+        self.model_name = model_name
+        self.watch_seconds = watch_seconds
+        self._current = None
+        self._listeners = []
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = None
+        self._stats = {"reloads": 0, "reload_failures": 0, "last_reload_seconds": None,
+                       "last_encoded": None, "last_error": None}
+
+    @property
+    def current(self) -> KBVersion:
+        kb = self._current
+        if kb is None:
+            # belum dimuat saat startup (mis. dipakai langsung dari script): muat sekarang
+            with self._reload_lock:
+                if self._current is None:
+                    self.load()
+            kb = self._current
+        return kb
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def add_listener(self, fn):
+        """fn(old, new) dipanggil setelah versi baru aktif (mis. untuk mengosongkan cache)."""
+        self._listeners.append(fn)
+
+    def load(self):
+        signature = _file_signature(self.kb_path)
+        self._current = _from_artifacts(
+            load_or_build(self.get_model, self.load_entries, self.kb_path, self.root, self.model_name)
+        )
+        self._signature = signature
+        return self._current
+
+    def reload(self):
+        """Bangun/muat versi KB sesuai isi file sekarang dan aktifkan kalau berbeda dari yang aktif."""
+        with self._reload_lock:
+            old = self._current
+            # signature baru dicatat hanya kalau file ini sudah terwakili versi aktif; kalau build gagal
+            # watcher tetap melihat file berubah dan mencoba lagi di poll berikutnya
+            signature = _file_signature(self.kb_path)
+            version = artifact_version(self.kb_path, self.model_name)
+            if old is not None and version == old.id:
+                self._signature = signature
+                return {"changed": False, "version": version}
+
+            started = time.perf_counter()
+            try:
+                # embedding versi aktif dipakai ulang untuk teks yang sama, kecuali salinan float16
+                # (INDEX_STORAGE terkompresi): vektor lossy itu akan masuk index & classifier versi baru
+                # dan hasil build jadi tergantung riwayat reload, bukan hanya isi file
+                reuse = None
+                if old is not None and old.embs.dtype == np.float32:
+                    reuse = dict(zip(old.texts, old.embs))
+                art = load_or_build(self.get_model, self.load_entries, self.kb_path, self.root,
+                                    self.model_name, reuse)
+                new = _from_artifacts(art)
+                # 0 kalau versi ini sudah dibangun sebelumnya (oleh worker lain / dari disk)
+                encoded = new.meta.get("encoded", 0) if art.get("built") else 0
+            except Exception as e:
+                self._stats["reload_failures"] += 1
+                self._stats["last_error"] = str(e)
+                raise
+            self._current = new
+            self._signature = signature
+            elapsed = time.perf_counter() - started
+            self._stats.update(
+                reloads=self._stats["reloads"] + 1,
+                last_reload_seconds=round(elapsed, 3),
+                last_encoded=encoded,
+                last_error=None,
+            )
+            logger.info("KB versi %s aktif (sebelumnya %s, %.2fs)", new.id, old.id if old else None, elapsed)
+
+        for fn in self._listeners:
+            try:
+                fn(old, new)
+            except Exception:
+                logger.exception("listener reload KB gagal")
+        return {
+            "changed": True,
+            "version": new.id,
+            "previous": old.id if old is not None else None,
+            "count": len(new.texts),
+            "encoded": encoded,
+            "seconds": round(elapsed, 3),
+        }
+
+    def start_watching(self):
+        if self.watch_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="kb-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_seconds):
+            if _file_signature(self.kb_path) == self._signature:
+                continue
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("reload KB gagal; versi %s tetap aktif", self._current.id if self._current else None)
+
+    def stats(self):
+        kb = self._current
+        data = dict(self._stats)
+        data.update(
+            version=kb.id if kb else None,
+            count=len(kb.texts) if kb else 0,
+            loaded_at=kb.loaded_at if kb else None,
+            watching=self._thread is not None and self._thread.is_alive(),
+            watch_seconds=self.watch_seconds,
+        )
+        return data
@@ -0,0 +1,98 @@
+import re
+import numpy as np
+from rapidfuzz import fuzz, process
+
+try:
+    import ahocorasick
+except ImportError:  # fallback ke regex kalau pyahocorasick belum terpasang
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    Matcher keyword multi-intent yang dikompilasi sekali di awal.
+
+    groups: list of (intent, keywords, fuzzy_threshold, max_len_diff), urut sesuai prioritas.
+    Sebuah grup dianggap cocok kalau ada kata yang mirip (fuzz.ratio >= threshold, dan
+    selisih panjang <= max_len_diff kalau diisi) atau keyword muncul sebagai substring.
+    Hasilnya intent dari grup cocok dengan prioritas tertinggi.
+    """
+
+    def __init__(self, groups):
+        self.intents = [g[0] for g in groups]
+        keywords, group_ids, thresholds, max_diffs = [], [], [], []
+        for gid, (_, kws, threshold, max_len_diff) in enumerate(groups):
+            for kw in kws:
+                keywords.append(kw)
+                group_ids.append(gid)
+                thresholds.append(threshold)
+                max_diffs.append(max_len_diff if max_len_diff is not None else float("inf"))
+
+        self._keywords = keywords
+        self._group = group_ids
+        self._threshold = np.array(thresholds, dtype=np.float32)
+        self._kw_len = [len(k) for k in keywords]
+        self._max_len_diff = max_diffs
+        self._min_threshold = float(self._threshold.min()) if keywords else 0.0
+
+        # keyword yang sama bisa ada di beberapa grup, simpan prioritas tertingginya
+        best_group = {}
+        for kw, gid in zip(keywords, group_ids):
+            best_group[kw] = min(gid, best_group.get(kw, gid))
+
+        self._automaton = None
+        self._patterns = None
+        if ahocorasick is not None and best_group:
+            automaton = ahocorasick.Automaton()
+            for kw, gid in best_group.items():
+                automaton.add_word(kw, gid)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            self._patterns = [
+                re.compile("|".join(re.escape(kw) for kw in kws)) if kws else None
+                for _, kws, _, _ in groups
+            ]
+
+    def _fuzzy_group(self, words):
+        best = len(self.intents)
+        if not words or not self._keywords:
+            return best
+        scores = process.cdist(
+            words, self._keywords, scorer=fuzz.ratio,
+            score_cutoff=self._min_threshold, dtype=np.float32,
+        )
+        rows, cols = np.nonzero(scores >= self._threshold)
+        # kandidat biasanya sedikit, cek syarat panjang kata per pasangan saja
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            gid = self._group[c]
+            if gid < best and abs(len(words[r]) - self._kw_len[c]) <= self._max_len_diff[c]:
+                best = gid
+        return best
+
+    def _substring_group(self, t: str, best: int):
+        if self._automaton is not None:
+            for _, gid in self._automaton.iter(t):
+                if gid < best:
+                    best = gid
+                    if best == 0:
+                        break
+            return best
+        for gid in range(best):
+            pattern = self._patterns[gid]
+            if pattern is not None and pattern.search(t):
+                return gid
+        return best
+
+    def match(self, t: str, words=None):
+        """t harus sudah di-preprocess (words: kata-katanya kalau sudah ada). Return intent atau None."""
+        best = self._fuzzy_group(t.split() if words is None else words)
+        if best > 0:
+            best = self._substring_group(t, best)
+        return self.intents[best] if best < len(self.intents) else None
+
+
+def contains_fuzzy_keyword(text, keywords, threshold=80):
+    """True kalau salah satu keyword punya fuzz.partial_ratio(kw, text) >= threshold."""
+    # extractOne jalan di C dan berhenti begitu ada skor 100; partial_ratio simetris
+    return process.extractOne(text, keywords, scorer=fuzz.partial_ratio, score_cutoff=threshold) is not None
@@ -0,0 +1,108 @@
+"""
+Tier classifier intent yang ringkas: probabilitas = softmax(W·x + b) atas embedding query yang sudah
+dinormalisasi (vektor yang sama dengan tier semantic), jadi prediksi cukup satu perkalian
+matriks-vektor, tanpa sklearn/joblib saat runtime.
+
+W dan b disimpan sebagai satu array float32 (C, d + 1) di artefak KB. Dua cara melatih:
+  centroid : W = rata-rata embedding per intent (dinormalisasi)
+  logreg   : bobot LogisticRegression multinomial
+Keduanya dikalibrasi dengan temperature scaling pada skor out-of-sample (leave-one-out untuk
+centroid, cross-validation untuk logreg), lalu temperatur dilebur ke W dan b.
+"""
+import numpy as np
+
+CLASSIFIER_TYPES = ("logreg", "centroid")
+# kandidat temperatur untuk kalibrasi (skala log)
+_TEMPERATURES = np.geomspace(0.02, 200.0, 81)
+
+
+def _softmax(Z):
+    Z = Z - Z.max(axis=1, keepdims=True)
+    np.exp(Z, out=Z)
+    Z /= Z.sum(axis=1, keepdims=True)
+    return Z
+
+
+def fit_temperature(scores, y) -> float:
+    """Temperatur dengan negative log-likelihood terkecil; scores (n, C) out-of-sample, y indeks kelas."""
+    scores = np.asarray(scores, dtype=np.float64)
+    rows = np.arange(len(y))
+    best, best_nll = 1.0, np.inf
+    for t in _TEMPERATURES:
+        P = _softmax(scores * t)
+        nll = -np.log(np.clip(P[rows, y], 1e-12, None)).mean()
+        if nll < best_nll:
+            best, best_nll = float(t), nll
+    return best
+
+
+class LinearIntentClassifier:
+    """Antarmuka seperti classifier sklearn yang dipakai cascade: classes_ dan predict_proba(X)."""
+    __slots__ = ("classes_", "weights", "kind", "temperature")
+
+    def __init__(self, classes, weights, kind: str = "logreg", temperature: float = 1.0):
+        self.classes_ = np.asarray(classes)
+        self.weights = weights
+        self.kind = kind
+        self.temperature = temperature
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        return X @ self.weights[:, :-1].T + self.weights[:, -1]
+
+    def predict_proba(self, X):
+        return _softmax(self.decision_function(X).astype(np.float64))
+
+    def predict(self, X):
+        return self.classes_[self.decision_function(X).argmax(axis=1)]
+
+    @classmethod
+    def fit(cls, embs, intents, kind: str = "logreg"):
+        if kind not in CLASSIFIER_TYPES:
+            raise ValueError(f"CLASSIFIER_TYPE tidak dikenal: {kind!r} (pilihan: {', '.join(CLASSIFIER_TYPES)})")
+        X = np.asarray(embs, dtype=np.float32)
+        classes, y = np.unique(np.asarray(intents), return_inverse=True)
+        W, b, t = (_fit_centroid if kind == "centroid" else _fit_logreg)(X, y, len(classes))
+        weights = np.ascontiguousarray(np.hstack([W * t, (b * t)[:, None]]), dtype=np.float32)
+        return cls(classes, weights, kind, t)
+
+    def meta(self):
+        return {"kind": self.kind, "classes": [str(c) for c in self.classes_], "temperature": self.temperature}
+
+
+def _fit_centroid(X, y, n_classes):
+    sums = np.zeros((n_classes, X.shape[1]), dtype=np.float64)
+    np.add.at(sums, y, X)
+    counts = np.bincount(y, minlength=n_classes).astype(np.float64)
+
+    def unit(M):
+        return M / np.clip(np.linalg.norm(M, axis=-1, keepdims=True), 1e-12, None)
+
+    C = unit(sums / counts[:, None])
+    # skor leave-one-out: centroid kelas sendiri dihitung tanpa kalimat itu (kalau kelasnya > 1 kalimat)
+    S = X @ C.T
+    rows = np.arange(len(y))
+    own = sums[y] - X
+    loo = np.where(counts[y][:, None] > 1, unit(own), C[y])
+    S[rows, y] = (X * loo).sum(axis=1)
+    return C, np.zeros(n_classes), fit_temperature(S, y)
+
+
+def _fit_logreg(X, y, n_classes):
+    # sklearn hanya dipakai saat membangun artefak
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    model = LogisticRegression(C=10.0, max_iter=2000)
+    model.fit(X, y)
+    W, b = model.coef_, model.intercept_
+    if n_classes == 2:
+        # sklearn menyimpan satu baris untuk kasus biner; jadikan dua kelas simetris
+        W, b = np.vstack([-W[0] / 2, W[0] / 2]), np.array([-b[0] / 2, b[0] / 2])
+
+    folds = min(5, int(np.bincount(y).min()))
+    if folds < 2:
+        return W, b, 1.0
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    S = cross_val_predict(LogisticRegression(C=10.0, max_iter=2000), X, y, cv=cv, method="predict_log_proba")
+    return W, b, fit_temperature(S, y)
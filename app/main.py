@@ -1,9 +1,30 @@
+# di-import paling awal supaya warmup.PROCESS_STARTED mendekati awal import app
+from . import warmup
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .routers import assistant
+from fastapi.responses import PlainTextResponse, JSONResponse
+from .routers import assistant, equipment
+from .metrics import render_prometheus
+from .services.conversation import WRITER
+from .database import dispose_async_engine
+from .embeddings import KB
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI(title="AI Assistant Konstruksi (read-only)", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # model, artefak KB, warm-up, watcher KB dan diagnostik jalan di background (lihat app/warmup.py);
+    # /health langsung hidup, /health/ready menunggu warm-up selesai
+    warmup.start()
+    yield
+    KB.stop()
+    # pastikan log percakapan yang masih di antrian ikut tertulis sebelum proses berhenti
+    if WRITER is not None:
+        WRITER.close()
+    await dispose_async_engine()
+
+
+app = FastAPI(title="AI Assistant Konstruksi (read-only)", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,7 +35,21 @@ app.add_middleware(
 )
 # DO NOT create tables here; service is read-only in production
 app.include_router(assistant.router, prefix="/assistant", tags=["assistant"])
+app.include_router(equipment.router, prefix="/equipment", tags=["equipment"])
 
+# async: tidak antre di thread pool bersama request sync, jadi probe tetap cepat saat sibuk
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready():
+    state = warmup.status()
+    if not warmup.is_ready():
+        return JSONResponse(state, status_code=503, headers={"Retry-After": "5"})
+    return state
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # format teks Prometheus (histogram per tahap + angka stats subsistem)
+    return PlainTextResponse(render_prometheus(assistant.collect_stats()), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,62 @@
+"""
+Normalisasi pesan user dalam satu tahap. parse() dipanggil sekali per pesan (pola regex sudah
+dikompilasi) dan hasilnya, ParsedMessage yang immutable, dipakai semua matcher dan lookup:
+key cache + encode intent, keyword intent, deteksi jenis alat, pencarian katalog (substring,
+trigram, fuzzy) dan fuzzy keyword list-all/keluhan. Dokumen katalog dinormalisasi dengan
+normalize() yang sama, jadi query dan index selalu sebanding.
+"""
+import re
+from collections import namedtuple
+
+# setelah lower(): selain huruf/angka (termasuk huruf Latin beraksen) jadi pemisah
+_NON_WORD = re.compile(r"[^0-9a-z\u00C0-\u017F]+")
+# huruf yang diulang 3x+ ("haloooo") jadi satu; angka tidak, supaya nomor model seperti "D6000" utuh
+_REPEATED = re.compile(r"([a-z\u00C0-\u017F])\1{2,}")
+
+TYPE_KEYWORDS = [
+    "truk", "dump truck", "dumptruck", "excavator", "eksavator",
+    "bulldozer", "buldoser", "crane", "crawler crane", "road roller", "roller",
+    "forklift", "grader", "loader"
+]
+
+# message: pesan apa adanya (huruf kecil, tanpa spasi di ujung), yang disimpan di riwayat
+# text: hasil normalize(); tokens: kata-kata text
+# trigrams: trigram text dengan spasi di awal/akhir (kandidat fuzzy), substring_trigrams: tanpa (substring)
+ParsedMessage = namedtuple("ParsedMessage", ["message", "text", "tokens", "equipment_type", "trigrams",
+                                             "substring_trigrams"])
+
+
+def normalize(text) -> str:
+    """Huruf kecil, tanda baca jadi spasi, huruf berulang dirapatkan, spasi dirapikan."""
+    t = _NON_WORD.sub(" ", (text or "").lower())
+    return " ".join(_REPEATED.sub(r"\1", t).split())
+
+
+def trigrams(text: str, padded: bool = True):
+    """Trigram dari teks yang sudah di-normalize; padded=False untuk pencarian substring."""
+    if padded:
+        text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def equipment_type(text: str):
+    """Jenis alat (dari TYPE_KEYWORDS, urutan = prioritas) yang disebut di teks yang sudah di-normalize."""
+    for tp in TYPE_KEYWORDS:
+        if tp in text:
+            return tp
+    return None
+
+
+def parse(raw) -> ParsedMessage:
+    if isinstance(raw, ParsedMessage):
+        return raw
+    message = (raw or "").lower().strip()
+    text = normalize(message)
+    return ParsedMessage(
+        message=message,
+        text=text,
+        tokens=tuple(text.split()),
+        equipment_type=equipment_type(text),
+        trigrams=frozenset(trigrams(text)) if text else frozenset(),
+        substring_trigrams=frozenset(trigrams(text, padded=False)),
+    )
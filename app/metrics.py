@@ -0,0 +1,152 @@
+"""
+Instrumentasi latency ringan: histogram per tahap pipeline chat, diekspor dalam format Prometheus.
+
+    with stage("faiss_search"):
+        ...
+
+Kalau METRICS_ENABLED=0, stage() mengembalikan context manager kosong (hampir tanpa overhead).
+Kalau METRICS_IN_META=1, rincian waktu per tahap untuk request berjalan ikut dikirim di meta.
+"""
+import re
+import time
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from .config import METRICS_ENABLED, METRICS_IN_META
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL = nullcontext()
+_breakdown = ContextVar("request_breakdown", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        for labelvalues, (counts, total, count) in sorted(items):
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, labelvalues))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram("assistant_stage_seconds", "Durasi per tahap pipeline chat", ["stage"])
+INTENT_SECONDS = Histogram("assistant_intent_seconds", "Durasi recognize_intent per sumber intent", ["source"])
+REQUEST_SECONDS = Histogram("assistant_request_seconds", "Durasi request end-to-end", ["endpoint", "intent"])
+
+
+class _StageTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(elapsed, self.name)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown[self.name] = round(breakdown.get(self.name, 0.0) + elapsed * 1000.0, 3)
+        return False
+
+
+def stage(name: str):
+    if not METRICS_ENABLED:
+        return _NULL
+    return _StageTimer(name)
+
+
+def observe_intent(source: str, seconds: float):
+    if METRICS_ENABLED:
+        INTENT_SECONDS.observe(seconds, source or "unknown")
+
+
+class request_timer:
+    """Ukur satu request; kalau METRICS_IN_META aktif, `timings` berisi rincian ms per tahap."""
+    __slots__ = ("endpoint", "started", "timings", "_token")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.timings = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = None
+        if METRICS_ENABLED and METRICS_IN_META:
+            self.timings = {}
+            self._token = _breakdown.set(self.timings)
+        return self
+
+    def finish(self, result: dict):
+        if not METRICS_ENABLED:
+            return result
+        elapsed = time.perf_counter() - self.started
+        REQUEST_SECONDS.observe(elapsed, self.endpoint, result.get("intent", "unknown"))
+        if self.timings is not None:
+            self.timings["total"] = round(elapsed * 1000.0, 3)
+            result["meta"] = dict(result.get("meta") or {}, timings_ms=self.timings)
+        return result
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _breakdown.reset(self._token)
+        return False
+
+
+def _gauge_lines(prefix: str, data: dict):
+    lines = []
+    for key, value in data.items():
+        key = str(key).replace("<=", "le_").replace(">", "gt_")
+        name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"{name} {value}")
+        elif isinstance(value, dict):
+            lines.extend(_gauge_lines(name, value))
+    return lines
+
+
+def render_prometheus(stats: dict = None) -> str:
+    """Semua histogram + angka-angka dari stats subsistem (cache, encoder, katalog, ...) sebagai gauge."""
+    lines = []
+    for h in (STAGE_SECONDS, INTENT_SECONDS, REQUEST_SECONDS):
+        lines.extend(h.render())
+    for name, data in (stats or {}).items():
+        if isinstance(data, dict):
+            lines.extend(_gauge_lines(f"assistant_{name}", data))
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Enum, func
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Enum, JSON, func
 from .database import Base
 import datetime
 import enum
@@ -33,3 +33,7 @@ class ConversationHistory(Base):
     message = Column(Text, nullable=False)
     sender = Column(Enum(SenderEnum), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # alat yang sudah di-resolve pada giliran ini (id products) + jenis alat dari TYPE_KEYWORDS,
+    # supaya pertanyaan lanjutan tidak perlu mencari ulang dari teks riwayat
+    equipment_ids = Column(JSON(none_as_null=True), nullable=True)
+    equipment_type = Column(String(64), nullable=True)
@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends
-from ..schemas import QueryRequest, QueryResponse
-from ..intent_recognizer import recognize_intent, plot_rf_boundary
-from ..database import SessionLocal
-from ..utils import find_equipment_by_name, aggregate_stock, LIST_ALL_KEYWORDS, preprocess, fuzzy_find_equipment
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import FileResponse
+from ..schemas import QueryRequest, QueryResponse, BatchQueryRequest, BatchQueryResponse
+from ..intent_recognizer import recognize_intent, recognize_intent_async, recognize_intents, query_cache_stats
+from ..database import SessionLocal, get_async_sessionmaker
+from ..utils import (find_equipment_by_name, aggregate_stock, LIST_ALL_KEYWORDS, preprocess, fuzzy_find_equipment,
+                     get_equipment_by_ids, get_all_equipment)
+from ..message import ParsedMessage, parse
 from sqlalchemy.orm import Session
-from ..services.conversation import save_message, get_recent_history
+from ..services.conversation import (save_message, get_context, record_message, warm_context_async,
+                                     persist_messages_async, conversation_writer_stats, context_store_stats)
+from ..services.diagnostics import get_diagnostics, get_plot_path
+from ..services.catalog import CATALOG, CatalogNotReady
+from ..services.answer_cache import rendered, rendered_catalog, answer_cache_stats
+from ..services.equipment_listing import encode_cursor
+from ..services.admission import Overloaded, admission_stats
+from ..embeddings import KB, encoder_stats, kb_index_stats
 from ..models import SenderEnum
-from rapidfuzz import fuzz
+from ..keyword_matcher import contains_fuzzy_keyword
+from ..metrics import stage, request_timer
+from ..config import ADMIN_TOKEN, LIST_PAGE_SIZE, ADMISSION_RETRY_AFTER_SECONDS
+from .. import warmup
 
 router = APIRouter()
 
@@ -17,29 +30,122 @@ def get_db():
     finally:
         db.close()
 
-# Fungsi untuk cek kemiripan fuzzy dengan threshold
-def contains_fuzzy_keyword(text, keywords, threshold=80):
-    for kw in keywords:
-        score = fuzz.partial_ratio(kw, text)
-        if score >= threshold:
-            return True
-    return False
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+async def require_ready():
+    # cek tanpa menunggu (tidak memakai thread pool): selama warm-up langsung 503 supaya dicoba lagi,
+    # warm-up yang gagal tidak akan selesai sendiri, jadi 500
+    if warmup.is_ready():
+        return
+    if warmup.status()["status"] == "error":
+        raise HTTPException(status_code=500, detail="Layanan gagal memuat model")
+    raise HTTPException(status_code=503, detail="Layanan sedang memuat model", headers={"Retry-After": "5"})
 
-@router.post("/query", response_model=QueryResponse)
+def _overloaded():
+    # ADMISSION_MODE=reject: antrian inference penuh, klien diminta mencoba lagi
+    return HTTPException(status_code=503, detail="Layanan sedang sibuk, coba lagi sebentar",
+                         headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)})
+
+@router.post("/query", response_model=QueryResponse, dependencies=[Depends(require_ready)])
 def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
     user_id = req.user_id if hasattr(req, "user_id") else "anonymous"
-    user_text = req.message.lower().strip()
-    
+    with request_timer("query") as timer:
+        # dinormalisasi sekali di sini; semua matcher & lookup di bawah memakai hasil yang sama
+        with stage("parse"):
+            msg = parse(req.message)
+        with stage("recognize_intent"):
+            try:
+                intent_info = recognize_intent(msg)
+            except Overloaded:
+                raise _overloaded()
+        return timer.finish(_respond(db, user_id, msg, intent_info))
+
+@router.post("/query/async", response_model=QueryResponse, dependencies=[Depends(require_ready)])
+async def chat_endpoint_async(req: QueryRequest, db=Depends(get_async_db)):
+    """
+    Sama dengan /query tanpa memakai thread per request: I/O DB lewat AsyncSession, inference
+    (encode, FAISS, classifier) di thread pool terbatas, sisanya dari snapshot/context store in-memory.
+    """
+    user_id = req.user_id if hasattr(req, "user_id") else "anonymous"
+    with request_timer("query_async") as timer:
+        with stage("parse"):
+            msg = parse(req.message)
+        with stage("recognize_intent"):
+            try:
+                intent_info = await recognize_intent_async(msg)
+            except Overloaded:
+                raise _overloaded()
+        # semua I/O yang mungkin dibutuhkan _respond dikerjakan di sini; sesudahnya tidak ada await
+        # sampai jawaban selesai, jadi riwayat yang baru di-warm tidak sempat tergusur
+        with stage("catalog_refresh"):
+            try:
+                await CATALOG.refresh_async(db)
+            except CatalogNotReady:
+                raise HTTPException(status_code=503, detail="Katalog sedang dimuat", headers={"Retry-After": "1"})
+        with stage("history"):
+            await warm_context_async(db, user_id)
+
+        messages = []
+        def record(_db, user_id, text, sender, entities=None):
+            with stage("save_message"):
+                messages.append(record_message(user_id, text, sender, **(entities or {})))
+
+        result = _respond(None, user_id, msg, intent_info, save=record)
+        with stage("persist_messages"):
+            await persist_messages_async(db, messages)
+        return timer.finish(result)
+
+@router.post("/query/batch", response_model=BatchQueryResponse, dependencies=[Depends(require_ready)])
+def batch_chat_endpoint(req: BatchQueryRequest, db: Session = Depends(get_db)):
+    """Banyak pesan sekaligus (mis. replay transkrip). Hasil per item sama dengan /query."""
+    msgs = [parse(item.message) for item in req.items]
+    # intent semua pesan dihitung sekaligus: satu encode batch + satu INDEX.search
+    with stage("recognize_intents_batch"):
+        try:
+            intents = recognize_intents(msgs)
+        except Overloaded:
+            raise _overloaded()
+
+    # lookup alat untuk teks yang sama cukup sekali dalam satu batch (dari snapshot katalog)
+    memo = {}
+    def find_cached(db, msg, limit=10):
+        key = ("name", msg.text, limit)
+        if key not in memo:
+            memo[key] = find_equipment_by_name(db, msg, limit=limit)
+        return memo[key]
+    def fuzzy_cached(db, msg, limit=5):
+        key = ("fuzzy", msg.text, limit)
+        if key not in memo:
+            memo[key] = fuzzy_find_equipment(db, msg, limit=limit)
+        return memo[key]
+
+    # diproses berurutan supaya konteks percakapan per user tetap sama seperti panggilan satu per satu
+    results = []
+    for item, msg, intent_info in zip(req.items, msgs, intents):
+        user_id = item.user_id if hasattr(item, "user_id") else "anonymous"
+        results.append(_respond(db, user_id, msg, intent_info, find=find_cached, fuzzy_find=fuzzy_cached))
+    return {"results": results}
+
+def _save(db: Session, user_id, text: str, sender: SenderEnum, entities=None):
+    with stage("save_message"):
+        save_message(db, user_id, text, sender, **(entities or {}))
+
+def _respond(db: Session, user_id, msg: ParsedMessage, intent_info: dict,
+             find=find_equipment_by_name, fuzzy_find=fuzzy_find_equipment, save=_save):
+    # db None: tanpa I/O DB (jalur async), katalog & riwayat sudah disiapkan pemanggil dan save dari pemanggil
     # Simpan pertanyaan user
-    save_message(db, user_id, user_text, SenderEnum.user)
+    save(db, user_id, msg.message, SenderEnum.user)
 
-    # Ambil percakapan terakhir
-    history = get_recent_history(db, user_id, limit=5)
+    # Ambil percakapan terakhir (dari context store in-memory)
+    with stage("history"):
+        history = get_context(db, user_id, limit=5)
 
     # Intent detection
-    intent_info = recognize_intent(user_text)
     intent = intent_info.get("intent", "unknown")
-    meta = {"source": intent_info.get("source"), "score": intent_info.get("score")}
+    meta = {"source": intent_info.get("source"), "score": intent_info.get("score"),
+            "kb_version": intent_info.get("kb_version")}
 
     # Cek pesan AI terakhir apakah berupa closing_keyword
     last_ai_message = None
@@ -54,53 +160,58 @@ def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
     # Tangani closing confirmation
     if last_ai_intent == "closing_keyword" and intent == "closing_confirmation":
         answer = "Terima kasih sudah menggunakan layanan kami. Semoga harimu menyenangkan!"
-        save_message(db, user_id, answer, SenderEnum.ai)
+        save(db, user_id, answer, SenderEnum.ai)
         return {
             "intent": "final_closing",
             "answer": answer,
-            "meta": {"source": "closing_confirmation"},
+            "meta": {"source": "closing_confirmation", "kb_version": meta["kb_version"]},
             "show_order_form": False
         }
 
-    if contains_fuzzy_keyword(user_text, LIST_ALL_KEYWORDS, threshold=80):
-        all_equipments = find_equipment_by_name(db, "", limit=50)  # Ambil semua data
-        if all_equipments:
-            lines = [
-                f"{e.name} — stok: {e.available_stock or e.stock} unit"
-                for e in all_equipments
-            ]
-            answer = "Berikut semua alat yang tersedia:\n" + "\n".join(lines)
-        else:
-            answer = "Saat ini belum ada data alat yang tersedia."
-        
-        save_message(db, user_id, answer, SenderEnum.ai)
+    if contains_fuzzy_keyword(msg.text, LIST_ALL_KEYWORDS, threshold=80):
+        with stage("list_all"):
+            CATALOG.refresh(db)
+            # halaman pertama (urut id) + token lanjutan untuk GET /equipment?cursor=...;
+            # sama untuk semua user selama katalog tidak berubah, jadi tidak diambil & diformat ulang
+            answer, next_cursor = rendered_catalog("list_all_equipment",
+                                                   lambda: get_all_equipment(db, limit=LIST_PAGE_SIZE + 1),
+                                                   _render_list_all)
+
+        save(db, user_id, answer, SenderEnum.ai)
         return {
             "intent": "list_all_equipment",
             "answer": answer,
-            "meta": meta,
+            "meta": dict(meta, next_cursor=next_cursor),
             "show_order_form": False
         }    
 
     # Cari produk yang dimaksud
-    equipments = find_equipment_by_name(db, user_text, limit=10)
+    with stage("equipment_lookup"):
+        equipments = find(db, msg, limit=10)
 
     # Kalau tidak ketemu, coba fuzzy
     if not equipments:
-        equipments = fuzzy_find_equipment(db, user_text, limit=5)
+        with stage("equipment_fuzzy"):
+            equipments = fuzzy_find(db, msg, limit=5)
+
+    # yang di-resolve dari teks giliran ini disimpan bersama jawabannya untuk pertanyaan lanjutan
+    # (hanya dari teks sendiri, seperti dulu saat riwayat dicari ulang per pesan user)
+    entities = {"equipment_ids": [e.id for e in equipments], "equipment_type": msg.equipment_type}
 
     if not equipments:
-        for h in history:
-            if h.sender == SenderEnum.user:
-                prev_equipments = find_equipment_by_name(db, h.message, limit=10)
-                if prev_equipments:
-                    equipments = prev_equipments
-                    break
+        with stage("history_lookup"):
+            # alat dari giliran sebelumnya: cukup ambil lagi lewat id, tanpa cari ulang teksnya
+            for h in history:
+                if getattr(h, "equipment_ids", None):
+                    equipments = get_equipment_by_ids(db, h.equipment_ids)
+                    if equipments:
+                        break
 
     # Logika tambahan untuk konten di luar konteks
     VALID_INTENTS = {"booking", "check_stock", "ask_price", "closing_keyword", "closing_confirmation", "complaint_keyword", "greeting", "price_sewa"}
     if intent == "unknown" and not equipments:
         answer = "Maaf, saya tidak mengerti maksud Anda."
-        save_message(db, user_id, answer, SenderEnum.ai)
+        save(db, user_id, answer, SenderEnum.ai, entities)
         return {
             "intent": "unknown_out_of_context",
             "answer": answer,
@@ -111,7 +222,7 @@ def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
     
     if intent in ["check_stock", "ask_price", "price_sewa"] and not equipments:
         answer = "Mohon maaf, alat tersebut belum tersedia."
-        save_message(db, user_id, answer, SenderEnum.ai)
+        save(db, user_id, answer, SenderEnum.ai, entities)
         return {
             "intent": intent,
             "answer": answer,
@@ -136,23 +247,17 @@ def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
             avail = e.available_stock if getattr(e, "available_stock", None) is not None else e.stock
             answer = f"{e.name} — stok saat ini: {avail} unit."
         else:
-            lines = [f"{e.name} — tersedia: {e.available_stock or e.stock} unit" for e in equipments[:6]]
-            total = aggregate_stock(equipments)
-            answer = "Berikut stok yang saya temukan:\n" + "\n".join(lines) + f"\nTotal (gabungan): {total} unit."
+            answer = rendered("check_stock", equipments, _render_stock_list)
 
     elif intent in ["ask_price", "price_sewa"]:
         if not equipments:
             answer = "Sebutkan nama atau model alat kontraktor yang ingin dicek harganya, ya."
         else:
-            lines = [
-                f"{e.name} — harga: Rp {int(e.price):,} / bulan — stok: {e.available_stock or e.stock}"
-                for e in equipments
-            ]
-            answer = "Harga yang saya temukan:\n" + "\n".join(lines)
+            answer = rendered("ask_price", equipments, _render_price_list)
 
     elif intent == "complaint_keyword":
         lateness_keywords = ["belum sampai", "lama", "ditunda", "kapan datang", "kapan sampai"]
-        if contains_fuzzy_keyword(user_text, lateness_keywords):
+        if contains_fuzzy_keyword(msg.text, lateness_keywords):
             answer = (
                 "Mohon maaf atas keterlambatan pengiriman alat kontraktor Anda. "
                 "Kami akan segera cek status pengiriman dan mengabari Anda."
@@ -178,8 +283,7 @@ def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
     else:
         answer = "Maaf, saya belum mengerti. Bisa jelaskan lebih detail?"
 
-    save_message(db, user_id, answer, SenderEnum.ai)
-    plot_rf_boundary()
+    save(db, user_id, answer, SenderEnum.ai, entities)
     return {
         "intent": intent,
         "answer": answer,
@@ -187,4 +291,66 @@ def chat_endpoint(req: QueryRequest, db: Session = Depends(get_db)):
         "show_order_form": show_order_form
     }
 
+def _render_list_all(all_equipments):
+    """(jawaban, next_cursor) untuk halaman pertama; all_equipments berisi maks. LIST_PAGE_SIZE + 1 baris."""
+    if not all_equipments:
+        return "Saat ini belum ada data alat yang tersedia.", None
+    page = all_equipments[:LIST_PAGE_SIZE]
+    lines = [
+        f"{e.name} — stok: {e.available_stock or e.stock} unit"
+        for e in page
+    ]
+    answer = "Berikut semua alat yang tersedia:\n" + "\n".join(lines)
+    if len(all_equipments) <= LIST_PAGE_SIZE:
+        return answer, None
+    next_cursor = encode_cursor(page[-1].id)
+    return answer + f"\nMasih ada alat lainnya, lihat halaman berikutnya: /equipment?cursor={next_cursor}", next_cursor
+
+def _render_stock_list(equipments):
+    lines = [f"{e.name} — tersedia: {e.available_stock or e.stock} unit" for e in equipments[:6]]
+    total = aggregate_stock(equipments)
+    return "Berikut stok yang saya temukan:\n" + "\n".join(lines) + f"\nTotal (gabungan): {total} unit."
+
+def _render_price_list(equipments):
+    lines = [
+        f"{e.name} — harga: Rp {int(e.price):,} / bulan — stok: {e.available_stock or e.stock}"
+        for e in equipments
+    ]
+    return "Harga yang saya temukan:\n" + "\n".join(lines)
 
+def collect_stats():
+    return {"catalog": CATALOG.stats(), "query_cache": query_cache_stats(), "answer_cache": answer_cache_stats(),
+            "admission": admission_stats(),
+            "encoder": encoder_stats(),
+            "kb": KB.stats(), "kb_index": kb_index_stats(), "startup": warmup.status(),
+            "conversation_writer": conversation_writer_stats(), "context_store": context_store_stats()}
+
+@router.get("/stats")
+def stats_endpoint():
+    return collect_stats()
+
+@router.get("/diagnostics")
+def diagnostics_endpoint():
+    # dihitung sekali per versi KB di background, endpoint ini hanya membaca hasilnya
+    state = get_diagnostics()
+    state["plot_url"] = "/assistant/diagnostics/plot" if get_plot_path() else None
+    return state
+
+@router.get("/diagnostics/plot")
+def diagnostics_plot():
+    path = get_plot_path()
+    if not path:
+        raise HTTPException(status_code=404, detail="Plot diagnostik belum tersedia")
+    return FileResponse(path, media_type="image/png")
+
+def require_admin(x_admin_token: str = Header(default="")):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token admin tidak valid")
+
+@router.post("/admin/kb/reload", dependencies=[Depends(require_admin)])
+def kb_reload():
+    """Muat ulang KB dari file sekarang (hanya worker yang menerima request ini; worker lain lewat watcher)."""
+    try:
+        return KB.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload KB gagal: {e}")
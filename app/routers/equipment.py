@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from ..schemas import EquipmentPage
+from ..services.equipment_listing import list_page, stream_ndjson
+from ..config import LIST_PAGE_SIZE, LISTING_MAX_PAGE_SIZE
+from .assistant import get_db
+
+router = APIRouter()
+
+@router.get("", response_model=EquipmentPage)
+def list_equipment(cursor: Optional[str] = None, limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LISTING_MAX_PAGE_SIZE),
+                   category: Optional[str] = None, manufacturer: Optional[str] = None,
+                   db: Session = Depends(get_db)):
+    """Satu halaman alat urut id; lanjutkan dengan ?cursor=<next_cursor>."""
+    try:
+        items, next_cursor = list_page(db, limit, cursor, category, manufacturer)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/stream")
+def stream_equipment(cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1),
+                     category: Optional[str] = None, manufacturer: Optional[str] = None):
+    """Semua alat (mulai setelah cursor) sebagai NDJSON, dibaca bertahap dari DB."""
+    try:
+        body = stream_ndjson(cursor, category, manufacturer, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(body, media_type="application/x-ndjson")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class QueryRequest(BaseModel):
@@ -11,6 +11,12 @@ class QueryResponse(BaseModel):
     answer: str
     meta: Optional[dict] = None
 
+class BatchQueryRequest(BaseModel):
+    items: List[QueryRequest]
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
 class EquipmentOut(BaseModel):
     id: int
     name: str
@@ -30,3 +36,8 @@ class EquipmentOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class EquipmentPage(BaseModel):
+    items: List[EquipmentOut]
+    # token untuk halaman berikutnya (None = halaman terakhir)
+    next_cursor: Optional[str] = None
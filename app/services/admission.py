@@ -0,0 +1,134 @@
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from ..config import (
+    ADMISSION_ENABLED, ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_MS, ADMISSION_MODE,
+    INFERENCE_POOL_WORKERS,
+)
+
+
+class Overloaded(Exception):
+    """Slot inference tidak didapat: antrian penuh atau menunggu terlalu lama."""
+
+
+class AdmissionController:
+    """
+    Pembatas konkurensi untuk tier yang berat (encode + FAISS + classifier).
+
+    Maksimal max_concurrent request dijalankan bersamaan; sisanya menunggu di antrian terbatas
+    (max_queue, maks. max_wait_ms). Kalau antrian penuh atau waktu tunggu habis, request langsung
+    ditolak (Overloaded) supaya latency request yang sudah masuk tidak ikut runtuh.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, max_wait_ms: float = 500,
+                 enabled: bool = True):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait_ms / 1000.0
+        self.enabled = enabled
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0, "wait_ms_total": 0.0}
+
+    def _acquire(self):
+        with self._cond:
+            if self._in_flight < self.max_concurrent and not self._waiting:
+                self._in_flight += 1
+                self._stats["admitted"] += 1
+                return
+            if self._waiting >= self.max_queue:
+                self._stats["shed_queue_full"] += 1
+                raise Overloaded("antrian inference penuh")
+            self._waiting += 1
+            self._stats["queued"] += 1
+            started = time.perf_counter()
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self._in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["shed_timeout"] += 1
+                        raise Overloaded("menunggu slot inference terlalu lama")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+                self._stats["wait_ms_total"] += (time.perf_counter() - started) * 1000.0
+            self._in_flight += 1
+            self._stats["admitted"] += 1
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        if not self.enabled:
+            yield
+            return
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update(in_flight=self._in_flight, queue_depth=self._waiting)
+        data["shed"] = data["shed_queue_full"] + data["shed_timeout"]
+        wait_ms_total = data.pop("wait_ms_total")
+        data["avg_wait_ms"] = round(wait_ms_total / data["queued"], 3) if data["queued"] else 0.0
+        data.update(enabled=self.enabled, max_concurrent=self.max_concurrent, max_queue=self.max_queue,
+                    max_wait_ms=self.max_wait * 1000.0, mode=ADMISSION_MODE)
+        return data
+
+
+class InferencePool:
+    """
+    Thread pool terbatas untuk kerja CPU (encode, FAISS, classifier) dari endpoint async, supaya
+    event loop tidak tertahan. Tugas yang belum selesai dibatasi max_pending; kelebihannya langsung
+    ditolak (Overloaded) alih-alih menumpuk di antrian executor yang tak terbatas.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 36):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="inference")
+        # hanya diubah dari event loop, jadi tidak perlu lock
+        self._pending = 0
+        self._stats = {"submitted": 0, "rejected": 0}
+
+    async def run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self._stats["rejected"] += 1
+            raise Overloaded("antrian thread pool inference penuh")
+        self._pending += 1
+        self._stats["submitted"] += 1
+        try:
+            # context (mis. rincian timing per request) ikut dibawa ke thread
+            call = functools.partial(contextvars.copy_context().run, fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            self._pending -= 1
+
+    def stats(self):
+        data = dict(self._stats)
+        data.update(workers=self.workers, max_pending=self.max_pending, pending=self._pending)
+        return data
+
+
+INFERENCE = AdmissionController(ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT_MS,
+                                enabled=ADMISSION_ENABLED)
+INFERENCE_POOL = InferencePool(INFERENCE_POOL_WORKERS, INFERENCE_POOL_WORKERS + ADMISSION_MAX_QUEUE)
+
+
+def admission_stats():
+    data = INFERENCE.stats()
+    data["pool"] = INFERENCE_POOL.stats()
+    return data
@@ -0,0 +1,38 @@
+from ..cache import LRUCache
+from ..config import ANSWER_CACHE_SIZE
+from .catalog import CATALOG
+
+# Jawaban yang hanya bergantung pada isi katalog (bukan user), key: (intent, id alat, versi katalog).
+# Versi katalog berubah setiap snapshot di-refresh dengan data baru (stok/harga/nama), jadi entri lama
+# tidak pernah terpakai lagi dan tersingkir sendiri oleh LRU.
+ANSWER_CACHE = LRUCache(ANSWER_CACHE_SIZE)
+
+
+def rendered(intent: str, equipments, render):
+    """render(equipments) -> str, dipakai ulang selama alat & versi katalog sama."""
+    version = CATALOG.version
+    key = (intent, tuple(e.id for e in equipments), version)
+    answer = ANSWER_CACHE.get(key)
+    if answer is None:
+        answer = render(equipments)
+        # baris dari snapshot lama (refresh terjadi di tengah request) tidak disimpan di versi baru
+        if CATALOG.is_current(equipments):
+            ANSWER_CACHE.put(key, answer)
+    return answer
+
+
+def rendered_catalog(intent: str, load, render):
+    """Seperti rendered() untuk jawaban seluruh katalog: load() (mis. list semua alat) dilewati kalau cache hit."""
+    version = CATALOG.version
+    key = (intent, None, version)
+    answer = ANSWER_CACHE.get(key)
+    if answer is None:
+        rows = load()
+        answer = render(rows)
+        if CATALOG.version == version and CATALOG.is_current(rows):
+            ANSWER_CACHE.put(key, answer)
+    return answer
+
+
+def answer_cache_stats():
+    return ANSWER_CACHE.stats()
@@ -0,0 +1,305 @@
+import time
+import asyncio
+import threading
+from collections import namedtuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+import numpy as np
+from rapidfuzz import fuzz, process
+from .ngram_index import TrigramIndex
+from ..message import normalize, parse
+from ..models import Equipment
+from ..config import CATALOG_POLL_SECONDS, CATALOG_FUZZY_CANDIDATES
+
+EQUIPMENT_FIELDS = [c.name for c in Equipment.__table__.columns]
+
+# Baris katalog dalam bentuk ringkas dan read-only; atributnya sama dengan model Equipment
+EquipmentRow = namedtuple("EquipmentRow", EQUIPMENT_FIELDS)
+
+# query katalog dalam bentuk kolom (bukan objek ORM), dipakai Session maupun AsyncSession
+_TABLE = Equipment.__table__
+_COUNT = select(func.count()).select_from(_TABLE)
+
+# kolom yang diindeks trigram untuk pencarian; field pertama (nama) yang dipakai scorer utama
+SEARCH_FIELDS = ("name", "category", "manufacturer", "model_number")
+
+
+def _changes_query(watermark):
+    q = select(_TABLE)
+    if watermark is not None:
+        # >= supaya baris dengan timestamp yang sama dengan watermark tidak terlewat
+        q = q.where(_TABLE.c.updated_at >= watermark)
+    return q
+
+
+def _search_fields(r: EquipmentRow):
+    return tuple(normalize(getattr(r, f)) for f in SEARCH_FIELDS)
+
+
+class _State:
+    """Isi snapshot pada satu waktu. Tidak pernah diubah, diganti utuh saat refresh."""
+    __slots__ = ("by_id", "rows", "names_lower", "by_name", "watermark", "search", "ngrams", "generation")
+
+    def __init__(self, by_id, watermark, search=None, ngrams=None, generation=0):
+        self.by_id = by_id
+        self.generation = generation
+        self.rows = tuple(by_id[k] for k in sorted(by_id))
+        # sama seperti sebelumnya: nama duplikat -> baris terakhir yang menang
+        self.by_name = {r.name: r for r in self.rows}
+        self.watermark = watermark
+        # teks ternormalisasi per kolom SEARCH_FIELDS + index trigram-nya
+        self.search = search if search is not None else {r.id: _search_fields(r) for r in self.rows}
+        self.ngrams = ngrams if ngrams is not None else TrigramIndex.build(self.search.items())
+        # nama ternormalisasi (normalisasi yang sama dengan pesan user) untuk pencocokan substring
+        self.names_lower = tuple(self.search[r.id][0] for r in self.rows)
+
+    def with_updates(self, by_id, updated, watermark):
+        """State baru setelah baris `updated` berubah/bertambah; index trigram diperbarui inkremental."""
+        search = dict(self.search)
+        changes = []
+        for r in updated:
+            old, new = search.get(r.id), _search_fields(r)
+            if old != new:
+                search[r.id] = new
+                changes.append((r.id, old, new))
+        ngrams = self.ngrams.updated(changes) if changes else self.ngrams
+        return _State(by_id, watermark, search, ngrams, self.generation + 1)
+
+
+class CatalogNotReady(Exception):
+    """Snapshot katalog belum pernah dimuat (refresh pertama sedang jalan di thread lain / gagal)."""
+
+
+class CatalogSnapshot:
+    """
+    Snapshot in-memory tabel products yang dibagi semua request.
+    Di-refresh inkremental pakai updated_at sebagai watermark setiap poll_seconds;
+    kalau jumlah baris tidak cocok (ada yang dihapus) snapshot dimuat ulang penuh.
+    """
+
+    def __init__(self, poll_seconds: float = CATALOG_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._state = _State({}, None)
+        self._loaded = False
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+        # request async yang datang sebelum snapshot pertama antre di sini, bukan di lock thread
+        self._first_load = asyncio.Lock()
+        self._stats = {
+            "lookups": 0,
+            "substring_hits": 0,
+            "fuzzy_hits": 0,
+            "misses": 0,
+            "full_refreshes": 0,
+            "incremental_refreshes": 0,
+            "rows_updated": 0,
+            "last_refresh_at": None,
+        }
+
+    def _due(self, force: bool) -> bool:
+        return force or not self._loaded or time.monotonic() - self._last_poll >= self.poll_seconds
+
+    def refresh(self, db: Session, force: bool = False, wait: bool = True):
+        """
+        Cek ulang ke DB kalau sudah waktunya. db None = tidak ada I/O, pakai snapshot apa adanya
+        (pemanggil async sudah memanggil refresh_async sebelumnya).
+        """
+        if db is None or not self._due(force):
+            return
+        # request lain cukup pakai snapshot lama selama ada yang sedang refresh
+        if not self._lock.acquire(blocking=wait and not self._loaded):
+            return
+        try:
+            if not self._due(force):
+                return
+            state = self._state
+            if self._loaded and not force:
+                changed = db.execute(_changes_query(state.watermark)).all()
+                total = db.execute(_COUNT).scalar() or 0
+                result = self._incremental_state(state, changed, total)
+                if result is not None:
+                    self._swap(*result)
+                    return
+            self._swap(self._full_state(state, db.execute(select(_TABLE)).all()))
+        finally:
+            self._lock.release()
+
+    async def refresh_async(self, db, force: bool = False):
+        """
+        refresh() lewat AsyncSession: query di event loop, membangun state baru (merge, _State, index
+        trigram) di thread supaya katalog besar tidak menahan request async lain. Sebelum snapshot
+        pertama ada, request async bergiliran mencoba memuatnya; kalau tetap kosong (sedang dimuat
+        thread lain) CatalogNotReady, bukan jawaban dari katalog kosong.
+        """
+        if not self._due(force):
+            return
+        if self._loaded:
+            await self._refresh_async(db, force)
+            return
+        async with self._first_load:
+            if not self._loaded:
+                await self._refresh_async(db, force)
+        if not self._loaded:
+            raise CatalogNotReady()
+
+    async def _refresh_async(self, db, force: bool):
+        # tanpa menunggu lock (tidak boleh blok event loop): yang sedang refresh cukup satu
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if not self._due(force):
+                return
+            state = self._state
+            if self._loaded and not force:
+                changed = (await db.execute(_changes_query(state.watermark))).all()
+                total = (await db.execute(_COUNT)).scalar() or 0
+                result = await asyncio.to_thread(self._incremental_state, state, changed, total)
+                if result is not None:
+                    self._swap(*result)
+                    return
+            rows = (await db.execute(select(_TABLE))).all()
+            self._swap(await asyncio.to_thread(self._full_state, state, rows))
+        finally:
+            self._lock.release()
+
+    def _swap(self, new, updated: int = None):
+        # dipanggil dengan _lock dipegang; pergantian snapshot = satu assignment referensi.
+        # updated None = muat ulang penuh, selain itu jumlah baris yang berubah (refresh inkremental)
+        if updated is None:
+            self._stats["full_refreshes"] += 1
+        else:
+            self._stats["rows_updated"] += updated
+            self._stats["incremental_refreshes"] += 1
+        self._state = new
+        self._last_poll = time.monotonic()
+        self._loaded = True
+        self._stats["last_refresh_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _full_state(self, state, rows):
+        """State baru dari semua baris tabel (tanpa I/O, boleh di thread lain)."""
+        by_id = {r.id: r for r in map(EquipmentRow._make, rows)}
+        return _State(by_id, self._max_updated_at(by_id.values()), generation=state.generation + 1)
+
+    def _incremental_state(self, state, changed, total):
+        """
+        (state baru, jumlah baris berubah) setelah baris `changed` digabung ke `state`; None kalau jumlah
+        baris tidak cocok dengan `total` (ada yang dihapus) sehingga perlu muat ulang penuh. Tanpa I/O.
+        """
+        by_id = state.by_id
+        updated = [r for r in map(EquipmentRow._make, changed) if by_id.get(r.id) != r]
+        if updated:
+            by_id = dict(by_id)
+            for r in updated:
+                by_id[r.id] = r
+        if len(by_id) != total:
+            return None
+        if updated:
+            state = state.with_updates(by_id, updated, self._max_updated_at(by_id.values()))
+        return state, len(updated)
+
+    @staticmethod
+    def _max_updated_at(rows):
+        stamps = [r.updated_at for r in rows if r.updated_at is not None]
+        return max(stamps) if stamps else None
+
+    @property
+    def version(self):
+        """Berubah setiap isi snapshot berubah: nomor generasi snapshot + watermark updated_at."""
+        state = self._state
+        return f"{state.generation}:{state.watermark.isoformat() if state.watermark else ''}"
+
+    def is_current(self, rows):
+        """True kalau semua baris masih sama persis dengan isi snapshot sekarang (tidak ada yang berubah)."""
+        by_id = self._state.by_id
+        return all(by_id.get(r.id) is r for r in rows)
+
+    def all(self, limit: int = None):
+        rows = self._state.rows
+        return list(rows if limit is None else rows[:limit])
+
+    def get(self, equipment_id):
+        return self._state.by_id.get(equipment_id)
+
+    def find_by_name(self, q, limit: int = 10):
+        """q: ParsedMessage (atau teks). Substring nama (seperti ilike) dulu, lalu fuzzy token_set_ratio."""
+        state = self._state
+        self._stats["lookups"] += 1
+        msg = parse(q)
+        q_lower = msg.text
+        rows = []
+        ids = state.ngrams.containing(q_lower, msg.substring_trigrams)
+        if ids is None:
+            # query < 3 huruf (termasuk "" = semua alat): scan biasa
+            for row, name in zip(state.rows, state.names_lower):
+                if q_lower in name:
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        break
+        else:
+            # kandidat dari index (punya semua trigram query), dicek ulang dengan substring asli
+            for i in sorted(ids):
+                if q_lower in state.search[i][0]:
+                    rows.append(state.by_id[i])
+                    if len(rows) >= limit:
+                        break
+        if rows:
+            self._stats["substring_hits"] += 1
+            return rows
+
+        matched = self._fuzzy(state, msg, fuzz.token_set_ratio, limit, 60)
+        self._stats["fuzzy_hits" if matched else "misses"] += 1
+        return [state.by_name[name] for name in matched]
+
+    def fuzzy_find(self, text, limit: int = 5, threshold: int = 70):
+        """Nama alat yang mirip sebagian dengan kalimat user (partial_ratio), skor tertinggi dulu."""
+        state = self._state
+        matched = self._fuzzy(state, parse(text), fuzz.partial_ratio, limit, threshold)
+        return [state.by_name[name] for name in matched]
+
+    @staticmethod
+    def _fuzzy(state, msg, scorer, limit: int, threshold: int):
+        """
+        Nama terbaik (maks. limit) dengan skor nama >= threshold, hanya dari kandidat index trigram.
+        Peringkat dan threshold hanya dari skor nama (`scorer`). Kategori/merk/model ikut memilih
+        kandidat lewat trigram dan hanya dipakai untuk memecah skor nama yang sama (token_set_ratio);
+        kolom itu sendiri tidak pernah meloloskan baris, supaya menyebut merk tidak menarik semua alat merk itu.
+        """
+        qn = msg.text
+        ids = state.ngrams.candidates(qn, CATALOG_FUZZY_CANDIDATES, grams=msg.trigrams) if qn else []
+        if not ids:
+            return []
+        ids = sorted(ids)
+        # satu panggilan cdist per kolom untuk semua kandidat
+        names, *others = zip(*(state.search[i] for i in ids))
+        name_scores = process.cdist([qn], names, scorer=scorer, dtype=np.float32)[0]
+        passed = name_scores >= threshold
+        if not passed.any():
+            return []
+        ties = np.zeros_like(name_scores)
+        for column in others:
+            # kategori/merk banyak yang sama: cukup nilai unik yang di-scoring
+            values = list(dict.fromkeys(column))
+            by_value = dict(zip(values, process.cdist([qn], values, scorer=fuzz.token_set_ratio, dtype=np.float32)[0]))
+            np.maximum(ties, [by_value[v] for v in column], out=ties)
+
+        matched = []
+        # skor nama, lalu skor kolom lain, lalu id (lexsort stabil, ids sudah urut)
+        for k in np.lexsort((-ties, -name_scores)):
+            if not passed[k] or len(matched) >= limit:
+                break
+            raw = state.by_id[ids[k]].name
+            if raw not in matched:
+                matched.append(raw)
+        return matched
+
+    def stats(self):
+        data = dict(self._stats)
+        data["rows"] = len(self._state.rows)
+        data["ngram_index"] = self._state.ngrams.stats()
+        data["watermark"] = self._state.watermark.isoformat() if self._state.watermark else None
+        data["version"] = self.version
+        data["poll_seconds"] = self.poll_seconds
+        return data
+
+
+CATALOG = CatalogSnapshot()
@@ -0,0 +1,111 @@
+import sys
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+class ContextStore:
+    """
+    Riwayat percakapan terbaru per user di memori (ring buffer per user).
+
+    Jumlah user dibatasi max_users; user yang paling lama tidak aktif dibuang duluan (LRU).
+    Kalau user belum ada di memori, warm() dipanggil (mis. ambil dari DB) untuk mengisi buffer.
+    Store ini per proses, jadi tiap worker uvicorn punya salinannya sendiri: buffer yang di-warm lebih
+    dari ttl_seconds lalu di-warm ulang pada akses berikutnya yang membawa warm(), supaya pesan yang
+    ditulis worker lain ikut terbaca. ttl_seconds 0 = tidak pernah di-warm ulang (satu worker / sticky).
+    """
+
+    def __init__(self, max_users: int = 10000, history_size: int = 5, ttl_seconds: float = 0):
+        self.max_users = max(1, max_users)
+        self.history_size = max(1, history_size)
+        self.ttl_seconds = ttl_seconds
+        self._users = OrderedDict()
+        # waktu (monotonic) buffer tiap user terakhir diisi dari warm()
+        self._warmed_at = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "warm_loads": 0, "evictions": 0}
+
+    def _fresh(self, user_id) -> bool:
+        # dipanggil dengan _lock dipegang
+        if user_id not in self._users:
+            return False
+        return self.ttl_seconds <= 0 or time.monotonic() - self._warmed_at[user_id] < self.ttl_seconds
+
+    def _insert(self, user_id, items):
+        # dipanggil dengan _lock dipegang
+        buf = deque(items, maxlen=self.history_size)
+        self._users[user_id] = buf
+        self._users.move_to_end(user_id)
+        self._warmed_at[user_id] = time.monotonic()
+        while len(self._users) > self.max_users:
+            evicted, _ = self._users.popitem(last=False)
+            del self._warmed_at[evicted]
+            self._stats["evictions"] += 1
+        return buf
+
+    def _ensure(self, user_id, warm=None):
+        with self._lock:
+            buf = self._users.get(user_id)
+            if buf is not None:
+                self._users.move_to_end(user_id)
+                # buffer kedaluwarsa tanpa warm() (mis. jalur async sesudah warm_context_async) tetap dipakai
+                if warm is None or self._fresh(user_id):
+                    self._stats["hits"] += 1
+                    return buf
+                self._stats["expired"] += 1
+            else:
+                self._stats["misses"] += 1
+            seen = self._warmed_at.get(user_id)
+        # I/O warm di luar lock; urutan item lama -> baru
+        items = []
+        if warm is not None:
+            items = list(warm(user_id, self.history_size))
+            self._stats["warm_loads"] += 1
+        with self._lock:
+            buf = self._users.get(user_id)
+            # ganti kalau belum ada atau belum di-warm ulang request lain selama I/O di atas
+            if buf is None or self._warmed_at.get(user_id) == seen:
+                buf = self._insert(user_id, items)
+            return buf
+
+    def has(self, user_id):
+        """True kalau buffer user ada dan belum kedaluwarsa (tidak perlu di-warm)."""
+        with self._lock:
+            return self._fresh(user_id)
+
+    def preload(self, user_id, items):
+        """
+        Isi buffer user dari item yang sudah diambil di luar (mis. query async); buffer yang masih
+        segar tidak diubah, yang kedaluwarsa diganti.
+        """
+        self._ensure(user_id, lambda _user_id, _limit: items)
+
+    def append(self, user_id, item, warm=None):
+        buf = self._ensure(user_id, warm)
+        with self._lock:
+            buf.append(item)
+
+    def recent(self, user_id, limit: int = 5, warm=None):
+        """Pesan terbaru dulu (urutan sama seperti query ORDER BY created_at DESC)."""
+        buf = self._ensure(user_id, warm)
+        with self._lock:
+            items = list(buf)
+        items.reverse()
+        return items[:limit]
+
+    def stats(self):
+        with self._lock:
+            buffers = list(self._users.values())
+        entries = sum(len(b) for b in buffers)
+        approx_bytes = sum(sys.getsizeof(b) for b in buffers)
+        approx_bytes += sum(sys.getsizeof(getattr(m, "message", "")) for b in buffers for m in list(b))
+        data = dict(self._stats)
+        data.update(
+            users=len(buffers),
+            max_users=self.max_users,
+            history_size=self.history_size,
+            ttl_seconds=self.ttl_seconds,
+            entries=entries,
+            approx_bytes=approx_bytes,
+        )
+        return data
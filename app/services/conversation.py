@@ -1,17 +1,250 @@
+import time
+import queue
+import asyncio
+import logging
+import datetime
+import threading
+from collections import namedtuple
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from ..database import SessionLocal
 from ..models import ConversationHistory, SenderEnum
+from .context_store import ContextStore
+from ..config import (
+    CONVERSATION_WRITE_BEHIND, CONVERSATION_QUEUE_SIZE, CONVERSATION_FLUSH_SIZE, CONVERSATION_FLUSH_INTERVAL_MS,
+    CONTEXT_MAX_USERS, CONTEXT_HISTORY_SIZE, CONTEXT_WARM_FROM_DB, CONTEXT_TTL_SECONDS,
+)
 
-def save_message(db: Session, user_id: str, message: str, sender: SenderEnum):
-    history = ConversationHistory(user_id=user_id, message=message, sender=sender)
-    db.add(history)
+logger = logging.getLogger(__name__)
+
+# Satu pesan percakapan (ringkas); dipakai di antrian write-behind dan context store
+ChatMessage = namedtuple("ChatMessage", ["user_id", "message", "sender", "created_at", "equipment_ids", "equipment_type"],
+                         defaults=(None, None))
+
+_STOP = object()
+
+
+class ConversationWriter:
+    """
+    Logger percakapan write-behind: pesan masuk antrian in-memory dan ditulis dengan bulk INSERT
+    oleh thread background saat batch penuh atau flush_interval lewat.
+    Kalau antrian penuh, pemanggil menunggu (backpressure) sampai ada ruang.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_queue: int = CONVERSATION_QUEUE_SIZE,
+                 flush_size: int = CONVERSATION_FLUSH_SIZE, flush_interval_ms: float = CONVERSATION_FLUSH_INTERVAL_MS,
+                 max_retries: int = 3):
+        self.session_factory = session_factory
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._stats = {"enqueued": 0, "flushed": 0, "batches": 0, "failed": 0, "backpressure_waits": 0}
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, item: ChatMessage):
+        if self._closed:
+            raise RuntimeError("ConversationWriter sudah ditutup")
+        self._ensure_worker()
+        with self._pending_lock:
+            self._pending.setdefault(item.user_id, []).append(item)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._stats["backpressure_waits"] += 1
+            self._queue.put(item)
+        self._stats["enqueued"] += 1
+        return item
+
+    def full(self):
+        return self._queue.full()
+
+    def pending_for(self, user_id):
+        with self._pending_lock:
+            return list(self._pending.get(user_id, ()))
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch):
+        rows = [item._asdict() for item in batch]
+        for attempt in range(self.max_retries):
+            db = self.session_factory()
+            try:
+                db.execute(insert(ConversationHistory), rows)
+                db.commit()
+                self._stats["flushed"] += len(batch)
+                self._stats["batches"] += 1
+                break
+            except Exception:
+                db.rollback()
+                logger.exception("flush %d pesan percakapan gagal (percobaan %d)", len(batch), attempt + 1)
+                time.sleep(0.1 * (attempt + 1))
+            finally:
+                db.close()
+        else:
+            self._stats["failed"] += len(batch)
+        with self._pending_lock:
+            for item in batch:
+                items = self._pending.get(item.user_id)
+                if items:
+                    items.remove(item)
+                    if not items:
+                        del self._pending[item.user_id]
+
+    def close(self, timeout: float = 10.0):
+        """Flush semua yang tersisa di antrian lalu hentikan worker (dipanggil saat shutdown)."""
+        self._closed = True
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        data = dict(self._stats)
+        data["queue_depth"] = self._queue.qsize()
+        data["write_behind"] = True
+        return data
+
+
+WRITER = ConversationWriter() if CONVERSATION_WRITE_BEHIND else None
+
+
+CONTEXT = ContextStore(CONTEXT_MAX_USERS, CONTEXT_HISTORY_SIZE, CONTEXT_TTL_SECONDS)
+
+
+def _as_messages(rows):
+    return [ChatMessage(r.user_id, r.message, r.sender, r.created_at, r.equipment_ids, r.equipment_type)
+            for r in reversed(rows)]
+
+def _db_warmer(db: Session):
+    if not CONTEXT_WARM_FROM_DB or db is None:
+        return None
+    def warm(user_id, limit):
+        return _as_messages(get_recent_history(db, user_id, limit=limit))
+    return warm
+
+def record_message(user_id: str, message: str, sender: SenderEnum, equipment_ids=None, equipment_type=None,
+                   warm=None):
+    """Pesan baru masuk context store (warm dulu kalau user belum dikenal); belum ditulis ke DB."""
+    item = ChatMessage(user_id, message, sender, datetime.datetime.now(),
+                       list(equipment_ids) if equipment_ids else None, equipment_type)
+    CONTEXT.append(user_id, item, warm=warm)
+    return item
+
+def save_message(db: Session, user_id: str, message: str, sender: SenderEnum,
+                 equipment_ids=None, equipment_type=None):
+    # context store diisi dulu (warm dari DB kalau perlu) sebelum pesan ini masuk antrian
+    item = record_message(user_id, message, sender, equipment_ids, equipment_type, warm=_db_warmer(db))
+    if WRITER is not None:
+        return WRITER.enqueue(item)
+    db.add(ConversationHistory(**item._asdict()))
     db.commit()
-    db.refresh(history)
+    return item
+
+async def warm_context_async(db, user_id: str):
+    """
+    Versi async dari warm context store: riwayat user yang belum dikenal (atau buffernya sudah lewat
+    CONTEXT_TTL_SECONDS) diambil lewat AsyncSession, supaya get_context/record_message sesudahnya tidak perlu I/O.
+    """
+    if not CONTEXT_WARM_FROM_DB or CONTEXT.has(user_id):
+        return
+    rows = await get_recent_history_async(db, user_id, limit=CONTEXT.history_size)
+    CONTEXT.preload(user_id, _as_messages(rows))
+
+async def persist_messages_async(db, items):
+    """Tulis pesan dari record_message: lewat write-behind kalau aktif, selain itu satu INSERT async."""
+    if not items:
+        return
+    if WRITER is not None:
+        for item in items:
+            if WRITER.full():
+                # backpressure: tunggu ruang antrian di thread, bukan di event loop
+                await asyncio.to_thread(WRITER.enqueue, item)
+            else:
+                WRITER.enqueue(item)
+        return
+    await db.execute(insert(ConversationHistory), [item._asdict() for item in items])
+    await db.commit()
+
+def get_context(db: Session, user_id: str, limit: int = 5):
+    """Riwayat terbaru user dari context store in-memory, tanpa query DB kalau user sudah dikenal."""
+    return CONTEXT.recent(user_id, limit=limit, warm=_db_warmer(db))
+
+def _same_message(a, b):
+    # created_at di DB bisa terpotong ke detik, jadi bandingkan dengan toleransi
+    if a.sender != b.sender or a.message != b.message or a.created_at is None or b.created_at is None:
+        return False
+    return abs((a.created_at.replace(tzinfo=None) - b.created_at.replace(tzinfo=None)).total_seconds()) < 1
 
 def get_recent_history(db: Session, user_id: str, limit: int = 5):
-    return (
+    # ambil pesan yang belum di-flush dulu supaya read-your-writes tetap berlaku
+    pending = WRITER.pending_for(user_id) if WRITER is not None else []
+    rows = (
         db.query(ConversationHistory)
         .filter(ConversationHistory.user_id == user_id)
         .order_by(ConversationHistory.created_at.desc())
         .limit(limit)
         .all()
     )
+    return _with_pending(rows, pending, limit)
+
+async def get_recent_history_async(db, user_id: str, limit: int = 5):
+    pending = WRITER.pending_for(user_id) if WRITER is not None else []
+    stmt = (
+        select(ConversationHistory)
+        .where(ConversationHistory.user_id == user_id)
+        .order_by(ConversationHistory.created_at.desc())
+        .limit(limit)
+    )
+    rows = (await db.execute(stmt)).scalars().all()
+    return _with_pending(rows, pending, limit)
+
+def _with_pending(rows, pending, limit: int):
+    if not pending:
+        return rows
+    extra = [p for p in pending if not any(_same_message(p, r) for r in rows)]
+    merged = sorted(extra + list(rows), key=lambda m: m.created_at.replace(tzinfo=None), reverse=True)
+    return merged[:limit]
+
+def conversation_writer_stats():
+    if WRITER is None:
+        return {"write_behind": False}
+    return WRITER.stats()
+
+def context_store_stats():
+    return CONTEXT.stats()
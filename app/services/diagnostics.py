@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+from ..kb_loader import BASE_DIR, CSV_PATH
+from ..embeddings import KB
+
+logger = logging.getLogger(__name__)
+
+# Hasil diagnostik disimpan per versi KB yang aktif (KBVersion.id): <versi>.png dan <versi>.json
+DIAGNOSTICS_DIR = os.path.join(BASE_DIR, "data", "diagnostics")
+# lock file dianggap basi kalau worker lain mati di tengah jalan
+LOCK_STALE_SECONDS = 600
+
+_lock = threading.Lock()
+_thread = None
+# versi KB yang menunggu dihitung thread diagnostik
+_pending = None
+_state = {"status": "idle", "kb_version": None, "error": None}
+
+
+def _paths(h: str):
+    base = os.path.join(DIAGNOSTICS_DIR, h)
+    return base + ".png", base + ".json", base + ".lock"
+
+
+def _atomic_write(path: str, write):
+    # tulis ke file sementara lalu rename, supaya worker lain tidak membaca file setengah jadi
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _dump_json(obj, path: str):
+    with open(path, "w") as f:
+        json.dump(obj, f)
+
+
+def _metrics(y_true, y_pred, labels):
+    """Akurasi, precision/recall/F1 (weighted & per intent) dan confusion matrix; y berupa indeks ke labels."""
+    n = len(labels)
+    cm = np.zeros((n, n), dtype=np.int64)
+    np.add.at(cm, (y_true, y_pred), 1)
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    precision = np.divide(tp, cm.sum(axis=0), out=np.zeros(n), where=cm.sum(axis=0) > 0)
+    recall = np.divide(tp, support, out=np.zeros(n), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(n), where=precision + recall > 0)
+    weights = support / max(int(support.sum()), 1)
+    return {
+        "accuracy": float(tp.sum() / max(len(y_true), 1)),
+        "precision": float(precision @ weights),
+        "recall": float(recall @ weights),
+        "f1": float(f1 @ weights),
+        "labels": labels,
+        "confusion_matrix": cm.tolist(),
+        "per_class": {
+            label: {"precision": float(precision[k]), "recall": float(recall[k]), "f1": float(f1[k]),
+                    "support": int(support[k])}
+            for k, label in enumerate(labels)
+        },
+    }
+
+
+def _stratified_folds(y, folds: int, seed: int = 42):
+    # tiap intent dibagi rata ke semua fold (urutan diacak dengan seed tetap)
+    rng = np.random.default_rng(seed)
+    fold_of = np.empty(len(y), dtype=np.int64)
+    for c in np.unique(y):
+        idx = rng.permutation(np.flatnonzero(y == c))
+        fold_of[idx] = np.arange(len(idx)) % folds
+    return fold_of
+
+
+def heldout_predictions(X, intents, kind: str, folds: int = 5):
+    """
+    Prediksi out-of-fold: classifier jenis `kind` dilatih ulang per fold dengan LinearIntentClassifier.fit.
+    None kalau ada intent dengan kalimat < 2. logreg butuh sklearn; kalau tidak terpasang dipakai centroid.
+    """
+    from ..linear_classifier import LinearIntentClassifier
+
+    intents = np.asarray(intents)
+    _, y, counts = np.unique(intents, return_inverse=True, return_counts=True)
+    folds = min(folds, int(counts.min()))
+    if folds < 2:
+        return None, kind
+    fold_of = _stratified_folds(y, folds)
+    pred = np.empty(len(intents), dtype=intents.dtype)
+    for f in range(folds):
+        train, test = fold_of != f, fold_of == f
+        try:
+            clf = LinearIntentClassifier.fit(X[train], intents[train], kind)
+        except ImportError:
+            kind = "centroid"
+            clf = LinearIntentClassifier.fit(X[train], intents[train], kind)
+        pred[test] = clf.predict(X[test])
+    return pred, kind
+
+
+def plot_decision_regions(clf, X, intents, png_path: str, folds: int = 5):
+    """
+    Plot daerah keputusan classifier KB (kb.clf, yang juga dipakai cascade) di bidang PCA 2D embedding,
+    simpan ke png_path, kembalikan metrik: kecocokan di data KB sendiri dan akurasi held-out (k-fold).
+    Hanya numpy + matplotlib.
+    """
+    from matplotlib.figure import Figure
+
+    # --- 1. Label ke indeks kelas classifier ---
+    X = np.asarray(X, dtype=np.float32)
+    labels = [str(c) for c in clf.classes_]
+    index_of = {c: k for k, c in enumerate(labels)}
+    y = np.array([index_of[str(t)] for t in intents])
+
+    def to_index(pred):
+        return np.array([index_of[str(p)] for p in pred])
+
+    # --- 2. Reduksi dimensi ke 2D (PCA lewat SVD) ---
+    mean = X.mean(axis=0)
+    _, _, vt = np.linalg.svd(X - mean, full_matrices=False)
+    components = vt[:2]
+    X_2d = (X - mean) @ components.T
+
+    # --- 3. Evaluasi classifier ---
+    heldout, heldout_kind = heldout_predictions(X, intents, clf.kind, folds)
+    metrics = {
+        "classifier": clf.kind,
+        "train": _metrics(y, to_index(clf.predict(X)), labels),
+        "heldout_classifier": heldout_kind,
+        "heldout": _metrics(y, to_index(heldout), labels) if heldout is not None else None,
+    }
+
+    # --- 4. Plot daerah keputusan ---
+    x_min, x_max = X_2d[:, 0].min() - 0.1, X_2d[:, 0].max() + 0.1
+    y_min, y_max = X_2d[:, 1].min() - 0.1, X_2d[:, 1].max() + 0.1
+    xx, yy = np.meshgrid(np.linspace(x_min, x_max, 300),
+                         np.linspace(y_min, y_max, 300))
+
+    # titik grid dikembalikan ke ruang embedding (mean + komponen), dinormalisasi seperti query,
+    # lalu diklasifikasi kb.clf; ini irisan 2D dari daerah keputusan yang sebenarnya
+    grid = mean + np.c_[xx.ravel(), yy.ravel()].astype(np.float32) @ components
+    grid /= np.clip(np.linalg.norm(grid, axis=1, keepdims=True), 1e-12, None)
+    Z = to_index(clf.predict(grid)).reshape(xx.shape)
+
+    # pakai Figure langsung (bukan pyplot) karena jalan di thread background
+    fig = Figure()
+    ax = fig.subplots()
+    levels = np.arange(len(labels) + 1) - 0.5
+    ax.contourf(xx, yy, Z, levels=levels, alpha=0.3, cmap="tab10", vmin=0, vmax=max(len(labels) - 1, 1))
+    scatter = ax.scatter(X_2d[:, 0], X_2d[:, 1], c=y, s=60, edgecolor="k", cmap="tab10",
+                         vmin=0, vmax=max(len(labels) - 1, 1))
+
+    handles, _ = scatter.legend_elements()
+    ax.legend(handles, [labels[k] for k in np.unique(y)], title="Intent")
+
+    ax.set_title(f"Daerah keputusan classifier {clf.kind} (PCA 2D)")
+    ax.set_xlabel("PC1")
+    ax.set_ylabel("PC2")
+    _atomic_write(png_path, lambda p: fig.savefig(p, format="png"))
+    return metrics
+
+
+def load_report(h: str):
+    _, json_path, _ = _paths(h)
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path) as f:
+        return json.load(f)
+
+
+def _acquire_file_lock(lock_path: str) -> bool:
+    # cegah beberapa worker uvicorn menghitung hal yang sama
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return True
+
+
+def _set_status(version: str, **kw):
+    # hasil untuk versi yang sudah digantikan tidak menimpa status versi aktif
+    with _lock:
+        if _state["kb_version"] == version:
+            _state.update(**kw)
+
+
+def _run(kb):
+    png_path, json_path, lock_path = _paths(kb.id)
+    try:
+        os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+        if not _acquire_file_lock(lock_path):
+            # worker lain sedang menghitung, cukup tunggu hasilnya di disk
+            _set_status(kb.id, status="running_elsewhere")
+            return
+        try:
+            started = time.time()
+            metrics = plot_decision_regions(kb.clf, kb.embs, list(kb.intents), png_path)
+            report = {
+                "kb_version": kb.id,
+                "kb_path": CSV_PATH,
+                "n_samples": len(kb.intents),
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "duration_seconds": round(time.time() - started, 3),
+                "metrics": metrics,
+            }
+            _atomic_write(json_path, lambda p: _dump_json(report, p))
+        finally:
+            os.remove(lock_path)
+        _set_status(kb.id, status="ready", error=None)
+    except Exception as e:
+        logger.exception("diagnostics gagal untuk kb %s", kb.id)
+        _set_status(kb.id, status="error", error=str(e))
+
+
+def _worker():
+    # satu thread menghitung versi yang diminta berurutan; versi yang datang saat sibuk diambil sesudahnya
+    global _thread, _pending
+    while True:
+        with _lock:
+            kb, _pending = _pending, None
+            if kb is None:
+                _thread = None
+                return
+        if load_report(kb.id) is None:
+            _run(kb)
+
+
+def ensure_diagnostics(kb=None):
+    """Jadwalkan perhitungan diagnostik di background kalau versi KB ini (default: yang aktif) belum punya hasil."""
+    global _thread, _pending
+    if kb is None:
+        if not KB.loaded:
+            # belum ada versi aktif; dijadwalkan dari warm-up setelah KB dimuat
+            return
+        kb = KB.current
+    with _lock:
+        if _state["kb_version"] == kb.id and _state["status"] in ("running", "ready"):
+            return
+        _state["kb_version"] = kb.id
+        if load_report(kb.id) is not None:
+            _state.update(status="ready", error=None)
+            return
+        _state.update(status="running", error=None)
+        _pending = kb
+        if _thread is None:
+            _thread = threading.Thread(target=_worker, name="diagnostics", daemon=True)
+            _thread.start()
+
+
+def get_diagnostics():
+    ensure_diagnostics()
+    with _lock:
+        state = dict(_state)
+    report = load_report(state["kb_version"]) if state["kb_version"] else None
+    if report is not None:
+        state["status"] = "ready"
+    state["report"] = report
+    return state
+
+
+def get_plot_path():
+    with _lock:
+        version = _state["kb_version"]
+    if version is None:
+        return None
+    png_path, _, _ = _paths(version)
+    return png_path if os.path.exists(png_path) else None
+
+
+# versi KB baru (hot reload) langsung dijadwalkan, tidak menunggu ada yang membuka /diagnostics
+KB.add_listener(lambda old, new: ensure_diagnostics(new))
@@ -0,0 +1,109 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+# batas atas bucket histogram ukuran batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class BatchingEncoder:
+    """
+    Encoder dengan dynamic micro-batching.
+
+    Panggilan encode() dari banyak request (thread) dikumpulkan di antrian, lalu satu thread
+    worker memanggil model.encode sekali untuk satu batch. Batch di-flush kalau sudah
+    max_batch_size item atau item pertama sudah menunggu max_wait_ms.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 3.0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._encode_total = 0.0
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="encoder-batcher", daemon=True)
+                self._thread.start()
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        """Kompatibel dengan SentenceTransformer.encode untuk list teks; hasil selalu numpy."""
+        self._ensure_worker()
+        futures = []
+        for t in texts:
+            f = Future()
+            self._queue.put((t, f, time.monotonic()))
+            futures.append(f)
+        return np.stack([f.result() for f in futures]) if futures else np.empty((0, 0), dtype=np.float32)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            try:
+                vecs = self.model.encode([t for t, _, _ in batch], convert_to_numpy=True)
+            except Exception as e:
+                for _, f, _ in batch:
+                    f.set_exception(e)
+                continue
+            done = time.monotonic()
+            for (_, f, _), v in zip(batch, vecs):
+                f.set_result(v)
+            self._record(batch, started, done)
+
+    def _record(self, batch, started, done):
+        waits = [started - enqueued for _, _, enqueued in batch]
+        bucket = next((i for i, b in enumerate(BATCH_SIZE_BUCKETS) if len(batch) <= b), len(BATCH_SIZE_BUCKETS))
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._encode_total += done - started
+            self._histogram[bucket] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": dict(zip(labels, self._histogram)),
+                "avg_wait_ms": round(self._wait_total / self._items * 1000.0, 3) if self._items else 0.0,
+                "max_wait_ms_observed": round(self._wait_max * 1000.0, 3),
+                "avg_encode_ms": round(self._encode_total / self._batches * 1000.0, 3) if self._batches else 0.0,
+            }
@@ -0,0 +1,81 @@
+"""
+Daftar alat dengan keyset pagination pada products.id (WHERE id > cursor ORDER BY id LIMIT n),
+jadi halaman ke-1000 sama murahnya dengan halaman pertama, dan stream NDJSON yang membaca
+tabel lewat server-side cursor (yield_per) supaya memori tetap datar berapa pun besar katalognya.
+"""
+import json
+import base64
+import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Equipment
+from ..config import LISTING_STREAM_BATCH
+
+
+def encode_cursor(last_id: int) -> str:
+    """Token lanjutan (opaque) setelah baris dengan id last_id."""
+    raw = json.dumps({"after": int(last_id)}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> int:
+    """id terakhir dari token; ValueError kalau token tidak valid."""
+    if not token:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        after = json.loads(raw)["after"]
+    except Exception:
+        raise ValueError("cursor tidak valid")
+    if not isinstance(after, int) or after < 0:
+        raise ValueError("cursor tidak valid")
+    return after
+
+
+def _filtered(stmt, after_id: int, category: str = None, manufacturer: str = None):
+    stmt = stmt.where(Equipment.id > after_id)
+    if category:
+        stmt = stmt.where(Equipment.category == category)
+    if manufacturer:
+        stmt = stmt.where(Equipment.manufacturer == manufacturer)
+    return stmt.order_by(Equipment.id)
+
+
+def list_page(db: Session, limit: int, cursor: str = None, category: str = None, manufacturer: str = None):
+    """(baris, next_cursor); next_cursor None kalau ini halaman terakhir."""
+    stmt = _filtered(select(Equipment), decode_cursor(cursor), category, manufacturer).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_ndjson(cursor: str = None, category: str = None, manufacturer: str = None, limit: int = None,
+                  session_factory=SessionLocal, batch_size: int = LISTING_STREAM_BATCH):
+    """
+    Generator baris NDJSON (satu alat per baris). Session dibuka sendiri karena generator
+    masih berjalan setelah dependency request selesai; cursor divalidasi sebelum stream mulai.
+    """
+    after_id = decode_cursor(cursor)
+    stmt = _filtered(select(*Equipment.__table__.columns), after_id, category, manufacturer)
+    if limit:
+        stmt = stmt.limit(limit)
+
+    def generate():
+        db = session_factory()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                yield "".join(json.dumps(dict(r._mapping), default=_json_default) + "\n" for r in rows)
+        finally:
+            db.close()
+
+    return generate()
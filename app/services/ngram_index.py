@@ -0,0 +1,147 @@
+"""
+Inverted index trigram karakter untuk pencarian alat di katalog besar.
+
+Teks tiap dokumen (nama, kategori, merk, nomor model) dinormalisasi dengan normalize() yang sama
+dengan pesan user (app/message.py), lalu dipecah jadi trigram (dengan spasi di awal/akhir). Query hanya
+dibandingkan dengan dokumen yang berbagi trigram, jadi scoring rapidfuzz cukup di beberapa
+ratus kandidat, bukan seluruh katalog.
+
+Index bersifat immutable seperti snapshot katalog: updated() membuat index baru yang berbagi
+posting list dengan yang lama, hanya trigram yang tersentuh baris berubah yang disalin.
+"""
+from collections import defaultdict
+import numpy as np
+from ..message import normalize, trigrams
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def doc_trigrams(fields):
+    grams = set()
+    for f in fields:
+        t = normalize(f)
+        if t:
+            grams |= trigrams(t)
+    return grams
+
+
+class TrigramIndex:
+    # di katalog besar, trigram yang muncul di lebih dari fraksi ini dari dokumen (mis. " ex")
+    # dilewati saat menghitung kandidat, kecuali semua trigram query memang umum
+    MAX_DF = 0.1
+    MAX_DF_MIN_DOCS = 1000
+
+    __slots__ = ("_postings", "_ids", "_slot_of", "_sizes")
+
+    def __init__(self, postings=None, ids=None, slot_of=None, sizes=None):
+        self._postings = postings or {}
+        self._ids = ids or []
+        self._slot_of = slot_of or {}
+        self._sizes = sizes if sizes is not None else _EMPTY
+
+    @classmethod
+    def build(cls, docs):
+        """docs: iterable (doc_id, fields)."""
+        buckets = defaultdict(list)
+        ids, sizes = [], []
+        for slot, (doc_id, fields) in enumerate(docs):
+            grams = doc_trigrams(fields)
+            ids.append(doc_id)
+            sizes.append(len(grams))
+            for g in grams:
+                buckets[g].append(slot)
+        postings = {g: np.asarray(v, dtype=np.int32) for g, v in buckets.items()}
+        return cls(postings, ids, {d: i for i, d in enumerate(ids)}, np.asarray(sizes, dtype=np.int32))
+
+    def updated(self, changes):
+        """changes: iterable (doc_id, old_fields atau None kalau baru, new_fields). Mengembalikan index baru."""
+        postings = dict(self._postings)
+        ids = list(self._ids)
+        slot_of = dict(self._slot_of)
+        sizes = list(self._sizes)
+        removed, added = defaultdict(list), defaultdict(list)
+        for doc_id, old, new in changes:
+            slot = slot_of.get(doc_id)
+            if slot is None:
+                slot = slot_of[doc_id] = len(ids)
+                ids.append(doc_id)
+                sizes.append(0)
+            old_grams = doc_trigrams(old) if old is not None else set()
+            new_grams = doc_trigrams(new)
+            for g in old_grams - new_grams:
+                removed[g].append(slot)
+            for g in new_grams - old_grams:
+                added[g].append(slot)
+            sizes[slot] = len(new_grams)
+
+        for g in removed.keys() | added.keys():
+            arr = postings.get(g, _EMPTY)
+            if g in removed:
+                arr = arr[~np.isin(arr, removed[g])]
+            if g in added:
+                arr = np.union1d(arr, np.asarray(added[g], dtype=np.int32)).astype(np.int32)
+            if arr.size:
+                postings[g] = arr
+            else:
+                postings.pop(g, None)
+        return TrigramIndex(postings, ids, slot_of, np.asarray(sizes, dtype=np.int32))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def candidates(self, query: str, limit: int = 200, grams=None):
+        """
+        doc_id yang paling banyak berbagi trigram dengan query (diurutkan dari yang terbaik).
+        Skor = jumlah trigram sama / min(trigram query, trigram dokumen), jadi nama pendek yang
+        seluruhnya ada di kalimat panjang tetap di atas (mirip partial_ratio / token_set_ratio).
+        grams: trigram query yang sudah dihitung (ParsedMessage.trigrams), query dianggap sudah di-normalize.
+        """
+        text = normalize(query) if grams is None else query
+        if not text or not self._ids:
+            return []
+        if grams is None:
+            grams = trigrams(text)
+        n = len(self._ids)
+        max_df = int(n * self.MAX_DF) if n >= self.MAX_DF_MIN_DOCS else n
+        rare, common = [], []
+        for g in grams:
+            arr = self._postings.get(g)
+            if arr is not None:
+                (rare if arr.size <= max_df else common).append(arr)
+        lists = rare or common
+        if not lists:
+            return []
+        slots, counts = np.unique(np.concatenate(lists), return_counts=True)
+        score = counts / np.minimum(len(grams), self._sizes[slots])
+        if slots.size > limit:
+            top = np.argpartition(-score, limit - 1)[:limit]
+            slots, score = slots[top], score[top]
+        order = np.argsort(-score, kind="stable")
+        ids = self._ids
+        return [ids[s] for s in slots[order]]
+
+    def containing(self, substring: str, grams=None):
+        """
+        Superset doc_id yang teksnya bisa memuat substring (semua trigram-nya ada); None kalau < 3 huruf.
+        grams: trigram tanpa padding yang sudah dihitung (ParsedMessage.substring_trigrams).
+        """
+        text = normalize(substring) if grams is None else substring
+        if len(text) < 3:
+            return None
+        lists = []
+        for g in (grams if grams is not None else trigrams(text, padded=False)):
+            arr = self._postings.get(g)
+            if arr is None:
+                return []
+            lists.append(arr)
+        lists.sort(key=len)
+        slots = lists[0]
+        for arr in lists[1:]:
+            if not slots.size:
+                break
+            slots = np.intersect1d(slots, arr, assume_unique=True)
+        ids = self._ids
+        return [ids[s] for s in slots]
+
+    def stats(self):
+        return {"docs": len(self._ids), "trigrams": len(self._postings)}
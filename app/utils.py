@@ -1,20 +1,10 @@
 from sqlalchemy.orm import Session
-from .models import Equipment
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
+from .services.catalog import CATALOG
+from .message import TYPE_KEYWORDS, normalize, parse
 import re
 
-def preprocess(text: str) -> str:
-    t = text.lower()
-    t = re.sub(r"[^0-9a-zA-Z\u00C0-\u017F\s]", " ", t)
-    t = re.sub(r"\s+", " ", t)
-    return t.strip()
-
-TYPE_KEYWORDS = [
-    "truk", "dump truck", "dumptruck", "excavator", "eksavator",
-    "bulldozer", "buldoser", "crane", "crawler crane", "road roller", "roller",
-    "forklift", "grader", "loader"
-]
+# satu normalisasi untuk semua matcher (lihat app/message.py)
+preprocess = normalize
 
 LIST_ALL_KEYWORDS = [
     # Bentuk umum & formal
@@ -50,25 +40,21 @@ def is_list_all_request(text: str):
             return True
     return False
 
-def get_all_equipment(db: Session):
-    """Ambil semua alat berat dari database."""
-    return db.query(Equipment).all()
-
-def find_equipment_by_name(db: Session, query: str, limit: int = 10):
-    q = preprocess(query)
-    # coba ilike dulu
-    rows = db.query(Equipment).filter(Equipment.name.ilike(f"%{q}%")).limit(limit).all()
-    if rows:
-        return rows
-    # fallback fuzzy matching dengan process.extract
-    all_rows = db.query(Equipment).all()
-    choices = {r.name: r for r in all_rows}
-    results = process.extract(q, choices.keys(), limit=limit, scorer=fuzz.token_set_ratio)
-    matched = []
-    for name, score in results:
-        if score >= 60:
-            matched.append(choices[name])
-    return matched
+def get_all_equipment(db: Session, limit: int = None):
+    """Ambil semua alat berat dari snapshot katalog (urut id, maks. limit)."""
+    CATALOG.refresh(db)
+    return CATALOG.all(limit)
+
+def find_equipment_by_name(db: Session, query, limit: int = 10):
+    # dilayani dari snapshot katalog in-memory (substring seperti ilike, lalu fuzzy); query: ParsedMessage atau teks
+    CATALOG.refresh(db)
+    return CATALOG.find_by_name(parse(query), limit=limit)
+
+def get_equipment_by_ids(db: Session, ids):
+    """Alat berdasarkan id (urutan dipertahankan), lookup primary key di snapshot katalog; id yang sudah hilang dilewati."""
+    CATALOG.refresh(db)
+    rows = (CATALOG.get(i) for i in ids or ())
+    return [r for r in rows if r is not None]
 
 def aggregate_stock(equipments):
     total = 0
@@ -80,20 +66,9 @@ def aggregate_stock(equipments):
     return total
 
 def fuzzy_find_equipment(db, text, limit=5, threshold=70):
-    # Ambil semua nama alat dari database
-    all_equipments = find_equipment_by_name(db, "", limit=100)
-    names = [e.name for e in all_equipments]
-
-    # Cari kandidat dengan fuzzy matching
-    matches = process.extract(text, names, scorer=fuzz.partial_ratio, limit=limit)
-    best_matches = [m for m in matches if m[1] >= threshold]
-
-    if not best_matches:
-        return []
-
-    # Ambil objek alat yang sesuai
-    matched_names = [m[0] for m in best_matches]
-    return [e for e in all_equipments if e.name in matched_names]
+    # fuzzy partial_ratio ke seluruh katalog, lewat kandidat index trigram di snapshot
+    CATALOG.refresh(db)
+    return CATALOG.fuzzy_find(text, limit=limit, threshold=threshold)
 
 def detect_type_from_text(value: str):
     """
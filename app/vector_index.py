@@ -0,0 +1,126 @@
+"""
+Pemilihan index FAISS berdasarkan ukuran KB (semua inner product di atas vektor ternormalisasi):
+
+- flat : IndexFlatIP, exact; dipakai sampai INDEX_FLAT_MAX vektor
+- hnsw : IndexHNSWFlat, graph; cepat dan recall tinggi untuk puluhan ribu vektor
+- ivf  : IndexIVFFlat, cluster; untuk KB yang sangat besar
+
+INDEX_TYPE=auto memilih otomatis; efSearch / nprobe diatur saat load tanpa perlu build ulang.
+INDEX_STORAGE=float16 / sq8 menyimpan vektor lewat scalar quantizer FAISS (IndexScalarQuantizer,
+IndexHNSWSQ, IndexIVFScalarQuantizer) sehingga memori vektor turun ke 1/2 atau 1/4.
+"""
+import math
+import faiss
+from .config import (
+    INDEX_TYPE, INDEX_FLAT_MAX, INDEX_HNSW_MAX, INDEX_HNSW_M, INDEX_HNSW_EF_CONSTRUCTION,
+    INDEX_EF_SEARCH, INDEX_IVF_NLIST, INDEX_NPROBE, INDEX_STORAGE,
+)
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf")
+# byte per dimensi untuk tiap jenis penyimpanan vektor
+INDEX_STORAGES = {"float32": 4, "float16": 2, "sq8": 1}
+
+
+def _qtype(storage: str):
+    if storage not in INDEX_STORAGES:
+        raise ValueError(f"INDEX_STORAGE tidak dikenal: {storage!r} (pilihan: {', '.join(INDEX_STORAGES)})")
+    if storage == "float16":
+        return faiss.ScalarQuantizer.QT_fp16
+    if storage == "sq8":
+        return faiss.ScalarQuantizer.QT_8bit
+    return None
+
+
+def choose_index_type(n: int, kind: str = INDEX_TYPE) -> str:
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"INDEX_TYPE tidak dikenal: {kind!r} (pilihan: {', '.join(INDEX_TYPES)})")
+    if kind != "auto":
+        return kind
+    if n <= INDEX_FLAT_MAX:
+        return "flat"
+    if n <= INDEX_HNSW_MAX:
+        return "hnsw"
+    return "ivf"
+
+
+def ivf_nlist(n: int, nlist: int = INDEX_IVF_NLIST) -> int:
+    if nlist > 0:
+        return nlist
+    # aturan umum: ~4*sqrt(n) cluster, minimal ~39 vektor latih per cluster
+    return max(1, min(int(4 * math.sqrt(n)), n // 39 or 1))
+
+
+def index_spec(kind: str = INDEX_TYPE, storage: str = INDEX_STORAGE) -> str:
+    """Parameter yang mempengaruhi isi index (ikut menentukan versi artefak)."""
+    spec = (f"{kind}:flat<={INDEX_FLAT_MAX}:hnsw<={INDEX_HNSW_MAX}:M={INDEX_HNSW_M}"
+            f":efc={INDEX_HNSW_EF_CONSTRUCTION}:nlist={INDEX_IVF_NLIST}")
+    # float32 tidak ditambahkan supaya versi artefak yang sudah ada tetap berlaku
+    return spec if storage == "float32" else f"{spec}:storage={storage}"
+
+
+def build_index(embs, kind: str = INDEX_TYPE, m: int = INDEX_HNSW_M,
+                ef_construction: int = INDEX_HNSW_EF_CONSTRUCTION, nlist: int = INDEX_IVF_NLIST,
+                storage: str = INDEX_STORAGE):
+    """embs harus float32 dan sudah dinormalisasi L2."""
+    n, dim = embs.shape
+    kind = choose_index_type(n, kind)
+    qtype = _qtype(storage)
+    ip = faiss.METRIC_INNER_PRODUCT
+    if kind == "flat":
+        index = faiss.IndexFlatIP(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, ip)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, m, ip) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, m, ip)
+        index.hnsw.efConstruction = ef_construction
+    else:
+        quantizer = faiss.IndexFlatIP(dim)
+        nl = ivf_nlist(n, nlist)
+        if qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dim, nl, ip)
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nl, qtype, ip)
+    # sq8 butuh min/max per dimensi; flat/fp16 tidak perlu (train no-op)
+    if not index.is_trained:
+        index.train(embs)
+    index.add(embs)
+    return configure_search(index)
+
+
+def configure_search(index, ef_search: int = INDEX_EF_SEARCH, nprobe: int = INDEX_NPROBE):
+    """Atur parameter pencarian (efSearch untuk HNSW, nprobe untuk IVF). Flat tidak berubah."""
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(nprobe, inner.nlist)
+    return index
+
+
+def index_kind(index) -> str:
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def index_storage(index) -> str:
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner = faiss.downcast_index(inner.storage)
+    if isinstance(inner, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "float16" if inner.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "float32"
+
+
+def index_stats(index):
+    inner = faiss.downcast_index(index)
+    storage = index_storage(index)
+    data = {"type": index_kind(index), "ntotal": int(index.ntotal), "dim": int(index.d), "storage": storage,
+            # ukuran vektor tersimpan (tanpa graph HNSW / list IVF)
+            "vector_bytes": int(index.ntotal) * int(index.d) * INDEX_STORAGES[storage]}
+    if isinstance(inner, faiss.IndexHNSW):
+        data.update(m=int(inner.hnsw.nb_neighbors(1)), ef_search=int(inner.hnsw.efSearch))
+    elif isinstance(inner, faiss.IndexIVF):
+        data.update(nlist=int(inner.nlist), nprobe=int(inner.nprobe))
+    return data
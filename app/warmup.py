@@ -0,0 +1,121 @@
+"""
+Startup bertahap: import app cepat (model, index, sklearn belum dimuat), lalu di lifespan satu
+thread background memuat encoder + artefak KB dan menjalankan encode/search/classifier sintetis
+supaya request pertama tidak menanggung inisialisasi lazy (torch, ONNX Runtime, FAISS).
+
+/health        : proses hidup (langsung 200)
+/health/ready  : 200 hanya setelah warm-up selesai, 503 selama masih loading / gagal
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# kira-kira saat import app dimulai (modul ini di-import dari app.main)
+PROCESS_STARTED = time.perf_counter()
+
+WARMUP_TEXTS = [
+    "halo",
+    "berapa stok excavator yang tersedia?",
+    "saya mau sewa dump truck untuk proyek jalan selama dua minggu, harga sewanya berapa ya?",
+]
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread = None
+_state = {"status": "idle", "error": None, "timings_ms": {}, "ready_after_s": None}
+
+
+@contextmanager
+def _timed(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _state["timings_ms"][name] = round((time.perf_counter() - started) * 1000.0, 3)
+
+
+def _run():
+    import numpy as np
+    import faiss
+    from .embeddings import KB, get_model, get_encoder
+    from .intent_recognizer import keyword_intent, preprocess
+
+    try:
+        with _timed("load_encoder"):
+            model = get_model()
+        with _timed("load_kb"):
+            kb = KB.current
+        with _timed("warmup_encode"):
+            X = np.ascontiguousarray(model.encode(WARMUP_TEXTS, convert_to_numpy=True), dtype=np.float32)
+            for t in WARMUP_TEXTS:
+                # jalur per-request (micro-batcher) juga, supaya worker thread-nya sudah jalan
+                get_encoder().encode([t], convert_to_numpy=True)
+        faiss.normalize_L2(X)
+        with _timed("warmup_search"):
+            kb.index.search(X, 3)
+        with _timed("warmup_classifier"):
+            kb.clf.predict_proba(X)
+        with _timed("warmup_keywords"):
+            for t in WARMUP_TEXTS:
+                keyword_intent(preprocess(t))
+        _warm_catalog()
+        KB.start_watching()
+
+        from .services.diagnostics import ensure_diagnostics
+        # diagnostik KB (plot daerah keputusan classifier + metrik) dihitung di background, bukan di request
+        ensure_diagnostics()
+        with _lock:
+            _state.update(status="ready", ready_after_s=round(time.perf_counter() - PROCESS_STARTED, 3))
+        _ready.set()
+        logger.info("warm-up selesai: %s", _state["timings_ms"])
+    except Exception as e:
+        logger.exception("startup gagal")
+        with _lock:
+            _state.update(status="error", error=str(e))
+
+
+def _warm_catalog():
+    # snapshot katalog pertama kali; DB yang belum siap tidak menggagalkan readiness
+    from .database import SessionLocal
+    from .services.catalog import CATALOG
+
+    db = SessionLocal()
+    try:
+        with _timed("warmup_catalog"):
+            CATALOG.refresh(db)
+    except Exception as e:
+        logger.warning("warm-up katalog gagal: %s", e)
+        with _lock:
+            _state["catalog_error"] = str(e).splitlines()[0]
+    finally:
+        db.close()
+
+
+def start():
+    """Mulai loading + warm-up di background (dipanggil dari lifespan)."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _state["status"] = "loading"
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def wait_ready(timeout: float = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def status():
+    with _lock:
+        data = dict(_state)
+        data["timings_ms"] = dict(_state["timings_ms"])
+    return data
@@ -0,0 +1,81 @@
+"""
+/assistant/query (sync, thread pool AnyIO) vs /assistant/query/async (AsyncSession + thread pool
+inference terbatas) pada banyak klien bersamaan, in-process tanpa jaringan dan tanpa MySQL.
+
+    python -m benchmarks.bench_async --equipment 5000 --history 20000 --requests 2000 --concurrency 50,200,1000 --out async.json
+
+Setup sama dengan benchmarks.run (SQLite sintetis + encoder stub, atau --real-model). Sebelum tiap
+pengukuran cache embedding/intent/jawaban dikosongkan supaya kedua jalur mulai dari kondisi yang sama;
+context store semua user sudah di-warm lebih dulu.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from .run import add_setup_args, setup, bench_http
+
+PATHS = {"sync": "/assistant/query", "async": "/assistant/query/async"}
+
+
+def clear_caches():
+    from app.intent_recognizer import EMBEDDING_CACHE, INTENT_CACHE
+    from app.services.answer_cache import ANSWER_CACHE
+    for cache in (EMBEDDING_CACHE, INTENT_CACHE, ANSWER_CACHE):
+        cache.clear()
+
+
+async def run(app, messages, levels, n_users):
+    from app import warmup
+    from app.services.admission import admission_stats
+
+    results = []
+    async with app.router.lifespan_context(app):
+        await asyncio.get_running_loop().run_in_executor(None, warmup.wait_ready, 600)
+        for path in PATHS.values():
+            # satu request per user: context store terisi, engine/pool kedua jalur sudah terbuka
+            await bench_http(app, messages[:n_users], 8, n_users, path)
+        for c in levels:
+            row = {"concurrency": c}
+            for name, path in PATHS.items():
+                clear_caches()
+                row[name] = await bench_http(app, messages, c, n_users, path)
+            s, a = row["sync"], row["async"]
+            if s.get("throughput_per_s") and a.get("throughput_per_s"):
+                row["throughput_ratio_async_vs_sync"] = round(a["throughput_per_s"] / s["throughput_per_s"], 3)
+            results.append(row)
+        stats = admission_stats()
+    return results, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_setup_args(parser)
+    parser.add_argument("--requests", type=int, default=2000, help="jumlah request HTTP per jalur per level")
+    parser.add_argument("--concurrency", default="50,200,1000", help="jumlah klien bersamaan, dipisah koma")
+    args = parser.parse_args(argv)
+    workdir, products, seed_s = setup(args)
+    from .seed import sample_messages
+    from app.main import app
+
+    messages = sample_messages(products, args.requests, seed=args.seed + 2)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    results, stats = asyncio.run(run(app, messages, levels, args.users))
+    report = {
+        "config": vars(args),
+        "workdir": workdir,
+        "seed_seconds": round(seed_s, 3),
+        "http": results,
+        "admission": stats,
+    }
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
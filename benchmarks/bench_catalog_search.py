@@ -0,0 +1,142 @@
+"""
+Latency pencarian nama alat (index trigram) di katalog besar, dibanding scan linear rapidfuzz.
+
+    python -m benchmarks.bench_catalog_search [--equipment 100000] [--queries 2000] [--out catalog.json]
+
+Katalog sintetis diisi ke SQLite sementara lalu dimuat lewat CatalogSnapshot (jalur yang sama
+dengan aplikasi). Diukur: waktu build index, lookup find_by_name / fuzzy_find, refresh inkremental
+setelah sebagian produk berubah, dan seberapa sering hasil teratas sama dengan scan linear.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+from .run import percentiles
+
+
+def linear_best(names, q, scorer, threshold):
+    from rapidfuzz import process
+    from rapidfuzz.utils import default_process
+
+    hit = process.extractOne(q, names, scorer=scorer, processor=default_process, score_cutoff=threshold)
+    return hit[0] if hit else None
+
+
+def timed(fn, inputs):
+    samples = []
+    for x in inputs:
+        t0 = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return percentiles(samples)
+
+
+def make_queries(products, n: int, seed: int):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        p = rng.choice(products)
+        name = p["name"].lower()
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(name.split()[-1])  # nomor model saja, mis. "k10"
+        elif kind < 0.7:
+            # salah ketik satu huruf
+            i = rng.randrange(len(name))
+            out.append(name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:])
+        else:
+            out.append(f"harga {name} berapa")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--equipment", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--linear-queries", type=int, default=200, help="jumlah query untuk pembanding scan linear")
+    parser.add_argument("--updates", type=int, default=500, help="jumlah produk yang diubah untuk uji refresh inkremental")
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="kontraktor-catalog-")
+    db_path = os.path.join(workdir, "catalog.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from rapidfuzz import fuzz
+    from app.database import Base, engine, SessionLocal
+    from app.models import Equipment
+    from app.services.catalog import CatalogSnapshot
+    from app.message import parse
+    from .seed import seed
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    products = seed(session, args.equipment, 0, 1, args.seed)
+
+    catalog = CatalogSnapshot(poll_seconds=0)
+    t0 = time.perf_counter()
+    catalog.refresh(session)
+    full_load_s = time.perf_counter() - t0
+
+    queries = make_queries(products, args.queries, args.seed + 1)
+    report = {
+        "config": vars(args),
+        "full_load_s": round(full_load_s, 3),
+        "ngram_index": catalog.stats()["ngram_index"],
+        "find_by_name": timed(lambda q: catalog.find_by_name(q, limit=10), queries),
+        "fuzzy_find": timed(lambda q: catalog.fuzzy_find(q, limit=5), queries),
+    }
+
+    # pembanding: scan linear rapidfuzz ke seluruh nama (cara lama, tanpa index)
+    names = [p["name"] for p in products]
+    sample = queries[: args.linear_queries]
+    report["linear_fuzzy_find"] = timed(lambda q: linear_best(names, q, fuzz.partial_ratio, 70), sample)
+    agree = 0
+    for q in sample:
+        got = catalog._fuzzy(catalog._state, parse(q), fuzz.partial_ratio, 1, 70)
+        want = linear_best(names, q, fuzz.partial_ratio, 70)
+        agree += (got[0] if got else None) == want
+    report["top1_agreement_with_linear"] = round(agree / max(1, len(sample)), 4)
+
+    # refresh inkremental: ubah nama sebagian produk, index cukup diperbarui untuk baris itu
+    rng = random.Random(args.seed + 2)
+    ids = rng.sample(range(1, args.equipment + 1), min(args.updates, args.equipment))
+    # seed memberi updated_at yang sama ke semua baris (= watermark, selalu ikut terambil oleh >=);
+    # geser watermark dulu lewat satu baris lain supaya yang diukur hanya baris yang berubah
+    later = datetime.datetime.utcnow() + datetime.timedelta(seconds=5)
+    primer = next(i for i in range(1, args.equipment + 1) if i not in ids)
+    session.query(Equipment).filter(Equipment.id == primer).update(
+        {"updated_at": later - datetime.timedelta(seconds=1)}, synchronize_session=False)
+    session.commit()
+    catalog.refresh(session)
+    for i in ids:
+        session.query(Equipment).filter(Equipment.id == i).update(
+            {"name": f"Excavator Baru X{i}", "updated_at": later}, synchronize_session=False)
+    session.commit()
+    t0 = time.perf_counter()
+    catalog.refresh(session)
+    report["incremental_refresh_s"] = round(time.perf_counter() - t0, 3)
+    report["incremental_found"] = sum(
+        1 for i in ids[:50] if any(r.id == i for r in catalog.find_by_name(f"baru x{i}", limit=10))
+    )
+    session.close()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Recall@k dan latency index FAISS (HNSW / IVF) dibanding IndexFlatIP exact.
+
+    python -m benchmarks.bench_index [--sizes 1000,20000,100000] [--k 3] [--real-model] [--out index.json]
+
+Vektor dasar = embedding KB asli (encoder stub, atau --real-model); KB diperbesar secara sintetis
+dengan variasi ber-noise dari embedding tersebut (mirip parafrase), lalu query juga variasi baru
+yang tidak ada di index. Ground truth = hasil IndexFlatIP di data yang sama.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import faiss
+
+from app.kb_loader import BASE_DIR, load_kb
+from app.vector_index import build_index, configure_search, ivf_nlist
+from .run import percentiles
+
+
+def kb_embeddings(real_model: bool, with_intents: bool = False):
+    entries = load_kb() + load_kb(os.path.join(BASE_DIR, "data", "training_kb_1.csv"))
+    texts = [e["text"] for e in entries]
+    if real_model:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        from app.encoders import load_encoder
+        model = load_encoder()
+    else:
+        from .stub_encoder import StubSentenceTransformer
+        model = StubSentenceTransformer()
+    X = np.ascontiguousarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    faiss.normalize_L2(X)
+    if with_intents:
+        return X, np.asarray([e["intent"] for e in entries])
+    return X
+
+
+def perturb(base, n: int, noise: float, rng, return_picks: bool = False):
+    # variasi acak dari vektor dasar; norma noise ~ `noise`, jadi cosine ke asalnya ~ 1/sqrt(1 + noise^2)
+    picks = rng.integers(0, len(base), size=n)
+    X = base[picks] + rng.standard_normal((n, base.shape[1])).astype(np.float32) * (noise / np.sqrt(base.shape[1]))
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    faiss.normalize_L2(X)
+    return (X, picks) if return_picks else X
+
+
+def expand(base, size: int, noise: float, rng):
+    if size <= len(base):
+        return np.ascontiguousarray(base[:size])
+    return np.vstack([base, perturb(base, size - len(base), noise, rng)])
+
+
+def recall_at_k(truth, found):
+    k = truth.shape[1]
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / float(truth.size) if k else 0.0
+
+
+def measure(index, queries, truth, k: int, single: int):
+    started = time.perf_counter()
+    _, I = index.search(queries, k)
+    batch_s = time.perf_counter() - started
+    samples = []
+    for q in queries[:single]:
+        t0 = time.perf_counter()
+        index.search(q[None, :], k)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return {
+        f"recall@{k}": round(recall_at_k(truth, I), 4),
+        "recall@1": round(float((I[:, 0] == truth[:, 0]).mean()), 4),
+        "single_query": percentiles(samples),
+        "batch_qps": round(len(queries) / batch_s, 1) if batch_s > 0 else None,
+    }
+
+
+def bench_size(base, size: int, args, rng):
+    X = expand(base, size, args.noise, rng)
+    Q = perturb(base, args.queries, args.noise, rng)
+
+    flat = faiss.IndexFlatIP(X.shape[1])
+    flat.add(X)
+    _, truth = flat.search(Q, args.k)
+
+    results = {"size": size, "dim": int(X.shape[1]), "flat": measure(flat, Q, truth, args.k, args.single)}
+
+    t0 = time.perf_counter()
+    hnsw = build_index(X, "hnsw")
+    results["hnsw"] = {"build_s": round(time.perf_counter() - t0, 3), "ef_search": {}}
+    for ef in args.ef_search:
+        configure_search(hnsw, ef_search=ef)
+        results["hnsw"]["ef_search"][ef] = measure(hnsw, Q, truth, args.k, args.single)
+
+    t0 = time.perf_counter()
+    ivf = build_index(X, "ivf")
+    results["ivf"] = {"build_s": round(time.perf_counter() - t0, 3), "nlist": ivf_nlist(size), "nprobe": {}}
+    for nprobe in args.nprobe:
+        configure_search(ivf, nprobe=nprobe)
+        results["ivf"]["nprobe"][nprobe] = measure(ivf, Q, truth, args.k, args.single)
+    return results
+
+
+def _ints(s):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,20000,100000", help="ukuran KB (setelah ekspansi sintetis)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=300, help="jumlah query satu-per-satu untuk persentil latency")
+    parser.add_argument("--ef-search", default="16,32,64,128")
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--real-model", action="store_true", help="pakai encoder asli (ENCODER_BACKEND) dari cache lokal")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="tulis JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+    args.ef_search = _ints(args.ef_search)
+    args.nprobe = _ints(args.nprobe)
+
+    rng = np.random.default_rng(args.seed)
+    base = kb_embeddings(args.real_model)
+    report = {
+        "config": vars(args),
+        "kb_rows": int(len(base)),
+        "results": [bench_size(base, size, args, rng) for size in _ints(args.sizes)],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Cek kesetaraan + micro-benchmark keyword_intent (matcher terkompilasi) vs loop lama.
+
+    python -m benchmarks.bench_keyword_intent [--n 2000] [--repeat 3]
+
+Exit code 1 kalau ada hasil yang berbeda dengan implementasi lama.
+"""
+import argparse
+import random
+import sys
+import time
+from rapidfuzz import fuzz
+
+from app.kb_loader import BASE_DIR, load_kb
+from app.intent_recognizer import (
+    keyword_intent, preprocess, PRICE_SEWA_PATTERNS, PRICE_KEYWORDS, BOOKING_KEYWORDS,
+    STOCK_KEYWORDS, CLOSING_KEYWORDS, CLOSING_CONFIRMATION_KEYWORDS, COMPLAINT_KEYWORDS,
+    GREETING_KEYWORDS,
+)
+from app.keyword_matcher import contains_fuzzy_keyword
+from app.utils import LIST_ALL_KEYWORDS
+
+LEGACY_ORDER = [
+    ("price_sewa", PRICE_SEWA_PATTERNS, 80, None),
+    ("ask_price", PRICE_KEYWORDS, 80, None),
+    ("booking", BOOKING_KEYWORDS, 80, None),
+    ("check_stock", STOCK_KEYWORDS, 80, None),
+    ("closing_keyword", CLOSING_KEYWORDS, 80, None),
+    ("closing_confirmation", CLOSING_CONFIRMATION_KEYWORDS, 90, 2),
+    ("complaint_keyword", COMPLAINT_KEYWORDS, 80, None),
+    ("greeting", GREETING_KEYWORDS, 90, 2),
+]
+
+
+def legacy_keyword_intent(text: str):
+    # implementasi lama: fuzzy per kata lalu substring, satu list demi satu list
+    t = preprocess(text)
+    words = t.split()
+    for intent, keywords, threshold, max_len_diff in LEGACY_ORDER:
+        for w in words:
+            for kw in keywords:
+                if max_len_diff is not None and abs(len(w) - len(kw)) > max_len_diff:
+                    continue
+                if fuzz.ratio(w, kw) >= threshold:
+                    return intent
+        for kw in keywords:
+            if kw in t:
+                return intent
+    return None
+
+
+def legacy_contains_fuzzy_keyword(text, keywords, threshold=80):
+    for kw in keywords:
+        if fuzz.partial_ratio(kw, text) >= threshold:
+            return True
+    return False
+
+
+def _mutate(text: str, rng: random.Random):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        if not chars:
+            break
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.3:
+            del chars[i]
+        elif op < 0.6:
+            chars.insert(i, rng.choice("abcdefghijklmnopqrstuvwxyz "))
+        elif op < 0.8 and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars[i] = chars[i] * 3
+    return "".join(chars)
+
+
+def build_corpus(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    base = [e["text"] for e in load_kb()]
+    base += [e["text"] for e in load_kb(f"{BASE_DIR}/data/training_kb_1.csv")]
+    for _, keywords, _, _ in LEGACY_ORDER:
+        base += list(keywords)
+    base += list(LIST_ALL_KEYWORDS)
+    base += ["", "   ", "min, stok truk ada berapa?", "excavator komatsu pc200", "xyz qwerty"]
+    corpus = list(base)
+    while len(corpus) < n:
+        a = rng.choice(base)
+        b = rng.choice(base) if rng.random() < 0.3 else ""
+        corpus.append(_mutate(f"{a} {b}".strip(), rng))
+    return corpus
+
+
+def _time_per_call(fn, corpus, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.n)
+
+    mismatches = [t for t in corpus if keyword_intent(t) != legacy_keyword_intent(t)]
+    for t in corpus:
+        low = t.lower().strip()
+        if contains_fuzzy_keyword(low, LIST_ALL_KEYWORDS) != legacy_contains_fuzzy_keyword(low, LIST_ALL_KEYWORDS):
+            mismatches.append(t)
+    for t in mismatches[:20]:
+        print(f"MISMATCH {t!r}: new={keyword_intent(t)!r} legacy={legacy_keyword_intent(t)!r}")
+    print(f"equivalence: {len(corpus) - len(mismatches)}/{len(corpus)} cocok")
+
+    legacy_us = _time_per_call(legacy_keyword_intent, corpus, args.repeat)
+    new_us = _time_per_call(keyword_intent, corpus, args.repeat)
+    print(f"keyword_intent legacy : {legacy_us:8.1f} us/call")
+    print(f"keyword_intent matcher: {new_us:8.1f} us/call ({legacy_us / new_us:.1f}x)")
+
+    legacy_us = _time_per_call(lambda t: legacy_contains_fuzzy_keyword(t, LIST_ALL_KEYWORDS), corpus, args.repeat)
+    new_us = _time_per_call(lambda t: contains_fuzzy_keyword(t, LIST_ALL_KEYWORDS), corpus, args.repeat)
+    print(f"contains_fuzzy_keyword legacy: {legacy_us:8.1f} us/call")
+    print(f"contains_fuzzy_keyword new   : {new_us:8.1f} us/call ({legacy_us / new_us:.1f}x)")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Biaya normalisasi pesan per request: parse() sekali (ParsedMessage) vs rangkaian normalisasi lama
+(lower di endpoint, preprocess intent untuk key cache / keyword / encode, preprocess utils untuk
+lookup & jenis alat, default_process rapidfuzz di pencarian katalog), plus kecocokan hasilnya.
+
+    python -m benchmarks.bench_parse [--equipment 5000] [--messages 5000] [--out parse.json]
+
+Diukur per pesan: parse(), normalisasi lama, dan jalur teks lengkap sesudah parse (keyword intent,
+fuzzy list-all, find_by_name, fuzzy_find, jenis alat) di snapshot katalog sintetis. Kecocokan:
+intent keyword, keputusan list-all dan jenis alat dengan normalisasi lama vs baru.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from .run import percentiles
+
+
+def legacy_intent_preprocess(text: str) -> str:
+    t = text.lower().strip()
+    t = re.sub(r"[^0-9a-zA-Z\u00C0-\u017F\s]", " ", t)
+    t = re.sub(r'(.)\1{2,}', r'\1', t)
+    t = re.sub(r"\s+", " ", t)
+    return t.strip()
+
+
+def legacy_utils_preprocess(text: str) -> str:
+    t = text.lower()
+    t = re.sub(r"[^0-9a-zA-Z\u00C0-\u017F\s]", " ", t)
+    t = re.sub(r"\s+", " ", t)
+    return t.strip()
+
+
+def legacy_catalog_normalize(text) -> str:
+    from rapidfuzz.utils import default_process
+    return " ".join(default_process(text or "").split())
+
+
+def legacy_normalizations(raw: str):
+    """Normalisasi yang dulu dikerjakan untuk satu pesan /query (tanpa tier semantic)."""
+    from app.message import trigrams
+    user_text = raw.lower().strip()                    # chat_endpoint
+    legacy_intent_preprocess(user_text)                 # key cache intent
+    legacy_intent_preprocess(user_text)                 # keyword_intent
+    q = legacy_utils_preprocess(user_text)              # find_equipment_by_name
+    q = q.lower()                                       # CatalogSnapshot.find_by_name
+    trigrams(legacy_catalog_normalize(q), padded=False)  # TrigramIndex.containing
+    legacy_catalog_normalize(user_text)                 # fuzzy_find -> _fuzzy
+    trigrams(legacy_catalog_normalize(user_text))       # TrigramIndex.candidates
+    legacy_utils_preprocess(user_text)                  # deteksi jenis alat
+    return user_text
+
+
+def noisy(messages, seed: int):
+    """Variasi penulisan chat: huruf kapital, tanda baca, huruf diulang, spasi ganda."""
+    rng = random.Random(seed)
+    out = []
+    for m in messages:
+        r = rng.random()
+        if r < 0.25:
+            m = m.upper()
+        elif r < 0.5:
+            m = m.replace(" ", "  ", 1) + rng.choice(["??", "!!", " ...", " :)"])
+        elif r < 0.7:
+            words = m.split()
+            i = rng.randrange(len(words))
+            w = words[i]
+            words[i] = w + w[-1] * rng.randint(2, 4)
+            m = " ".join(words)
+        out.append(m)
+    return out
+
+
+def timed(fn, inputs, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for x in inputs:
+            t0 = time.perf_counter()
+            fn(x)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return percentiles(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--equipment", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="kontraktor-parse-")
+    db_path = os.path.join(workdir, "parse.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from app.database import Base, engine, SessionLocal
+    from app.services.catalog import CatalogSnapshot
+    from app.message import parse, equipment_type
+    from app.intent_recognizer import KEYWORD_MATCHER, keyword_intent
+    from app.keyword_matcher import contains_fuzzy_keyword
+    from app.utils import LIST_ALL_KEYWORDS
+    from .seed import seed, sample_messages
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    products = seed(session, args.equipment, 0, 1, args.seed)
+    catalog = CatalogSnapshot(poll_seconds=3600)
+    catalog.refresh(session)
+    session.close()
+
+    messages = noisy(sample_messages(products, args.messages, seed=args.seed + 1), args.seed + 2)
+
+    def pipeline(raw):
+        msg = parse(raw)
+        keyword_intent(msg)
+        contains_fuzzy_keyword(msg.text, LIST_ALL_KEYWORDS, threshold=80)
+        if not catalog.find_by_name(msg, limit=10):
+            catalog.fuzzy_find(msg, limit=5)
+        return msg.equipment_type
+
+    parse_t = timed(parse, messages, args.repeat)
+    legacy_t = timed(legacy_normalizations, messages, args.repeat)
+    pipeline_t = timed(pipeline, messages, args.repeat)
+
+    same = {"keyword_intent": 0, "list_all": 0, "equipment_type": 0}
+    diffs = []
+    for raw in messages:
+        msg = parse(raw)
+        old_text = legacy_intent_preprocess(raw)
+        old_user_text = raw.lower().strip()
+        pairs = {
+            "keyword_intent": (KEYWORD_MATCHER.match(old_text), keyword_intent(msg)),
+            "list_all": (contains_fuzzy_keyword(old_user_text, LIST_ALL_KEYWORDS, threshold=80),
+                         contains_fuzzy_keyword(msg.text, LIST_ALL_KEYWORDS, threshold=80)),
+            "equipment_type": (equipment_type(legacy_utils_preprocess(raw)), msg.equipment_type),
+        }
+        for name, (old, new) in pairs.items():
+            if old == new:
+                same[name] += 1
+            elif len(diffs) < 10:
+                diffs.append({"message": raw, "check": name, "old": old, "new": new})
+
+    report = {
+        "config": vars(args),
+        "parse": parse_t,
+        "legacy_normalization": legacy_t,
+        "text_pipeline": pipeline_t,
+        # jalur teks lama ~= jalur sekarang - parse + normalisasi lama (matcher & lookup sama)
+        "legacy_text_pipeline_est_mean_ms": round(pipeline_t["mean_ms"] - parse_t["mean_ms"] + legacy_t["mean_ms"], 4),
+        "agreement": {k: round(v / len(messages), 4) for k, v in same.items()},
+        "differences": diffs,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
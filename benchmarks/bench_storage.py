@@ -0,0 +1,94 @@
+"""
+Memori vs ketepatan penyimpanan vektor KB: float32 (sekarang), float16 dan sq8 (INDEX_STORAGE).
+
+    python -m benchmarks.bench_storage [--sizes 1000,20000,100000] [--kinds flat,hnsw] [--real-model] [--out storage.json]
+
+KB diperbesar secara sintetis seperti bench_index (variasi ber-noise dari embedding KB asli, intent ikut
+kalimat asalnya). Untuk tiap jenis index dan penyimpanan dilaporkan: ukuran vektor, ukuran file
+index + embs.npy di artefak (yang di-mmap tiap worker), kecocokan intent top-1 dan id top-1 dibanding
+IndexFlatIP float32, serta latency satu query.
+"""
+import sys
+import json
+import argparse
+import numpy as np
+import faiss
+
+from app.vector_index import INDEX_STORAGES, build_index, index_stats
+from .bench_index import kb_embeddings, perturb, measure, _ints
+
+
+def artifact_bytes(index, n: int, dim: int, storage: str):
+    # embs.npy: float32 untuk storage float32, selain itu float16 (lihat kb_artifacts.build_artifacts)
+    embs = n * dim * (4 if storage == "float32" else 2)
+    return int(faiss.serialize_index(index).size) + embs
+
+
+def bench_size(base, intents, size: int, args, rng):
+    extra, picks = perturb(base, max(0, size - len(base)), args.noise, rng, return_picks=True)
+    X = np.vstack([base, extra])[:size]
+    labels = np.concatenate([intents, intents[picks]])[:size]
+    Q, qpicks = perturb(base, args.queries, args.noise, rng, return_picks=True)
+
+    flat = faiss.IndexFlatIP(X.shape[1])
+    flat.add(X)
+    _, truth = flat.search(Q, args.k)
+    truth_intent = labels[truth[:, 0]]
+
+    results = {"size": size, "dim": int(X.shape[1]),
+               "query_intent_accuracy_flat": round(float((truth_intent == intents[qpicks]).mean()), 4)}
+    for kind in args.kinds:
+        results[kind] = {}
+        for storage in args.storages:
+            index = build_index(X, kind, storage=storage)
+            _, I = index.search(Q, 1)
+            stats = index_stats(index)
+            row = measure(index, Q, truth, args.k, args.single)
+            row.update(
+                vector_bytes=stats["vector_bytes"],
+                artifact_bytes=artifact_bytes(index, size, X.shape[1], storage),
+                top1_intent_agreement=round(float((labels[I[:, 0]] == truth_intent).mean()), 4),
+            )
+            results[kind][storage] = row
+        base_bytes = results[kind]["float32"]["artifact_bytes"] if "float32" in results[kind] else None
+        for storage, row in results[kind].items():
+            if base_bytes:
+                row["artifact_ratio_vs_float32"] = round(row["artifact_bytes"] / base_bytes, 3)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,20000,100000")
+    parser.add_argument("--kinds", default="flat,hnsw", help="jenis index (flat, hnsw, ivf)")
+    parser.add_argument("--storages", default=",".join(INDEX_STORAGES))
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=300, help="jumlah query satu-per-satu untuk persentil latency")
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--real-model", action="store_true", help="pakai encoder asli (ENCODER_BACKEND) dari cache lokal")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="tulis JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+    args.kinds = [k for k in args.kinds.split(",") if k.strip()]
+    args.storages = [s for s in args.storages.split(",") if s.strip()]
+
+    rng = np.random.default_rng(args.seed)
+    base, intents = kb_embeddings(args.real_model, with_intents=True)
+    report = {
+        "config": vars(args),
+        "kb_rows": int(len(base)),
+        "results": [bench_size(base, intents, size, args, rng) for size in _ints(args.sizes)],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
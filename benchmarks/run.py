@@ -0,0 +1,194 @@
+"""
+Benchmark & load test in-process, tanpa jaringan dan tanpa MySQL.
+
+    python -m benchmarks.run --equipment 5000 --history 20000 --requests 500 --concurrency 1,8,32 --out bench.json
+
+Database diganti SQLite sementara yang diisi data sintetis, SentenceTransformer diganti encoder stub
+deterministik (atau --real-model untuk memakai model yang sudah ada di cache lokal HuggingFace).
+Hasil: persentil latency per tahap + end-to-end dan throughput, dalam JSON.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"count": 0}
+    a = np.asarray(samples_ms)
+    return {
+        "count": int(a.size),
+        "mean_ms": round(float(a.mean()), 4),
+        "p50_ms": round(float(np.percentile(a, 50)), 4),
+        "p90_ms": round(float(np.percentile(a, 90)), 4),
+        "p99_ms": round(float(np.percentile(a, 99)), 4),
+        "max_ms": round(float(a.max()), 4),
+    }
+
+
+def time_calls(fn, inputs):
+    samples = []
+    started = time.perf_counter()
+    for x in inputs:
+        t0 = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - started
+    result = percentiles(samples)
+    result["throughput_per_s"] = round(len(inputs) / elapsed, 2) if elapsed > 0 else None
+    return result
+
+
+def bench_stages(messages):
+    from app.database import SessionLocal
+    from app.intent_recognizer import keyword_intent, recognize_intent, semantic_match
+    from app.utils import find_equipment_by_name, fuzzy_find_equipment
+
+    db = SessionLocal()
+    try:
+        # refresh pertama snapshot katalog dihitung terpisah
+        t0 = time.perf_counter()
+        find_equipment_by_name(db, "", limit=1)
+        first_load_ms = (time.perf_counter() - t0) * 1000.0
+        return {
+            "keyword_intent": time_calls(keyword_intent, messages),
+            "semantic_match": time_calls(semantic_match, messages),
+            "recognize_intent": time_calls(recognize_intent, messages),
+            "find_equipment_by_name": time_calls(lambda m: find_equipment_by_name(db, m, limit=10), messages),
+            "fuzzy_find_equipment": time_calls(lambda m: fuzzy_find_equipment(db, m, limit=5), messages),
+            "catalog_first_load_ms": round(first_load_ms, 3),
+        }
+    finally:
+        db.close()
+
+
+async def bench_http(app, messages, concurrency: int, n_users: int, path: str = "/assistant/query"):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    samples, errors = [], 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def one(i, msg):
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                r = await client.post(path, json={"user_id": i % n_users, "message": msg})
+                samples.append((time.perf_counter() - t0) * 1000.0)
+                if r.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, m) for i, m in enumerate(messages)))
+        elapsed = time.perf_counter() - started
+
+    result = percentiles(samples)
+    result.update(
+        concurrency=concurrency,
+        errors=errors,
+        elapsed_s=round(elapsed, 3),
+        throughput_per_s=round(len(messages) / elapsed, 2) if elapsed > 0 else None,
+    )
+    return result
+
+
+async def run_http(app, messages, levels, n_users):
+    from app import warmup
+
+    results = []
+    # lifespan (startup/shutdown) tidak dijalankan oleh ASGITransport, jadi dipanggil manual
+    async with app.router.lifespan_context(app):
+        await asyncio.get_running_loop().run_in_executor(None, warmup.wait_ready, 600)
+        await bench_http(app, messages[: min(20, len(messages))], 1, n_users)  # warm-up
+        for c in levels:
+            results.append(await bench_http(app, messages, c, n_users))
+    return results
+
+
+def add_setup_args(parser):
+    parser.add_argument("--equipment", type=int, default=1000, help="jumlah baris products sintetis")
+    parser.add_argument("--history", type=int, default=5000, help="jumlah baris conversation_history sintetis")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--real-model", action="store_true", help="pakai SentenceTransformer asli dari cache lokal")
+    parser.add_argument("--no-cache", action="store_true", help="matikan cache embedding/intent")
+    parser.add_argument("--workdir", default=None, help="direktori untuk SQLite & artefak (default: temp)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="tulis JSON ke file (default: stdout)")
+
+
+def setup(args):
+    """SQLite sintetis + env (sebelum app di-import); hasil: (workdir, products, detik seeding)."""
+    workdir = args.workdir or tempfile.mkdtemp(prefix="kontraktor-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, "bench.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    # semua env harus di-set sebelum modul app di-import
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["KB_ARTIFACTS_DIR"] = os.path.join(workdir, "artifacts")
+    if args.no_cache:
+        os.environ["QUERY_CACHE_SIZE"] = "0"
+    if args.real_model:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+    else:
+        from . import stub_encoder
+        stub_encoder.install()
+
+    from app.database import Base, engine, SessionLocal
+    from app import models  # noqa: F401  (daftarkan tabel ke Base.metadata)
+    from .seed import seed
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    t0 = time.perf_counter()
+    products = seed(session, args.equipment, args.history, args.users, args.seed)
+    seed_s = time.perf_counter() - t0
+    session.close()
+    return workdir, products, seed_s
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_setup_args(parser)
+    parser.add_argument("--requests", type=int, default=300, help="jumlah request HTTP per level konkurensi")
+    parser.add_argument("--stage-samples", type=int, default=300, help="jumlah pesan untuk benchmark per tahap")
+    parser.add_argument("--concurrency", default="1,8,32", help="level konkurensi, dipisah koma")
+    args = parser.parse_args(argv)
+    workdir, products, seed_s = setup(args)
+    from .seed import sample_messages
+
+    t0 = time.perf_counter()
+    from app.main import app
+    startup_s = time.perf_counter() - t0
+
+    stage_messages = sample_messages(products, args.stage_samples, seed=args.seed + 1)
+    http_messages = sample_messages(products, args.requests, seed=args.seed + 2)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    report = {
+        "config": vars(args),
+        "workdir": workdir,
+        "seed_seconds": round(seed_s, 3),
+        "import_seconds": round(startup_s, 3),
+        "stages": bench_stages(stage_messages),
+        "http": asyncio.run(run_http(app, http_messages, levels, args.users)),
+    }
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
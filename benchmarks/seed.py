@@ -0,0 +1,66 @@
+"""Isi database SQLite pengganti tabel products dan conversation_history dengan data sintetis."""
+import random
+import datetime
+
+CATEGORIES = ["excavator", "dump truck", "bulldozer", "crane", "road roller", "forklift", "grader", "loader"]
+MANUFACTURERS = ["Komatsu", "Caterpillar", "Hitachi", "Hino", "Tadano", "Sakai", "Toyota", "Volvo", "Kobelco"]
+USER_MESSAGES = [
+    "stok {name} ada berapa?", "harga {name} berapa?", "berapa sewa {name} per bulan",
+    "saya mau booking {name}", "{name} masih ready ga", "halo min", "ok makasih",
+    "alat saya rusak", "apa saja alat yang tersedia", "{cat} ada?", "sudah cukup",
+]
+AI_MESSAGES = ["Selamat datang! Ada yang bisa saya bantu?", "Ada lagi yang bisa saya bantu?",
+               "Mohon maaf, alat tersebut belum tersedia."]
+
+
+def equipment_name(rng: random.Random, i: int):
+    cat = rng.choice(CATEGORIES)
+    return f"{cat.title()} {rng.choice(MANUFACTURERS)} {chr(65 + i % 26)}{i}", cat
+
+
+def seed(session, n_equipment: int, n_history: int, n_users: int = 100, seed: int = 42):
+    from app.models import Equipment, ConversationHistory, SenderEnum
+
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    products = []
+    for i in range(n_equipment):
+        name, cat = equipment_name(rng, i)
+        stock = rng.randint(0, 20)
+        products.append({
+            "id": i + 1, "name": name, "price": float(rng.randint(5, 200) * 1_000_000),
+            "category": cat, "stock": stock, "available_stock": rng.randint(0, stock),
+            "manufacturer": name.split()[-2], "model_number": name.split()[-1],
+            "warranty_months": rng.choice([0, 6, 12, 24]), "weight": rng.uniform(1, 50),
+            "created_at": now, "updated_at": now,
+        })
+    session.bulk_insert_mappings(Equipment, products)
+
+    history = []
+    for i in range(n_history):
+        sender = SenderEnum.user if i % 2 == 0 else SenderEnum.ai
+        if sender == SenderEnum.user:
+            p = rng.choice(products) if products else {"name": "excavator", "category": "excavator"}
+            msg = rng.choice(USER_MESSAGES).format(name=p["name"].lower(), cat=p["category"])
+        else:
+            msg = rng.choice(AI_MESSAGES)
+        history.append({
+            "user_id": str(rng.randrange(n_users)), "message": msg, "sender": sender,
+            "created_at": now - datetime.timedelta(seconds=n_history - i),
+        })
+    session.bulk_insert_mappings(ConversationHistory, history)
+    session.commit()
+    return products
+
+
+def sample_messages(products, n: int, seed: int = 7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        p = rng.choice(products) if products else {"name": "excavator", "category": "excavator"}
+        name = p["name"].lower()
+        if rng.random() < 0.5:
+            # sebut sebagian nama saja / salah ketik, supaya jalur fuzzy ikut teruji
+            name = " ".join(name.split()[:2])
+        out.append(rng.choice(USER_MESSAGES).format(name=name, cat=p["category"]))
+    return out
@@ -0,0 +1,109 @@
+"""
+Profil waktu startup: `python -X importtime` untuk `import app.main`, lalu waktu sampai /health/ready.
+
+    python -m benchmarks.startup_profile [--top 25] [--real-model] [--out startup.json]
+
+Bagian import dijalankan di subprocess terpisah (cache modul bersih). Laporan berisi modul dengan
+waktu import kumulatif terbesar (termasuk import lazy selama warm-up, mis. FAISS saat memuat
+index), total per paket top-level, dan rincian tahap warm-up.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# dijalankan di subprocess: import app, jalankan warm-up, cetak status sebagai JSON
+_CHILD = """
+import sys, time, json
+started = time.perf_counter()
+if {stub!r}:
+    from benchmarks import stub_encoder
+    stub_encoder.install()
+import app.main
+imported = time.perf_counter()
+from app import warmup
+warmup.start()
+warmup.wait_ready({timeout})
+status = warmup.status()
+status.update(import_s=round(imported - started, 3), ready_s=round(time.perf_counter() - started, 3))
+print("@@STARTUP@@" + json.dumps(status))
+"""
+
+
+def parse_importtime(stderr: str):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, rest = line.split(":", 1)
+        self_us, cumulative_us, name = rest.split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize(rows, top: int):
+    by_cumulative = sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    return {
+        "modules": len(rows),
+        "total_self_ms": round(sum(r[1] for r in rows) / 1000.0, 1),
+        "top_cumulative": [{"module": n, "cumulative_ms": round(c / 1000.0, 1), "self_ms": round(s / 1000.0, 1)}
+                           for n, s, c in by_cumulative],
+        "by_package_ms": {k: round(v / 1000.0, 1)
+                          for k, v in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--real-model", action="store_true", help="pakai encoder asli dari cache lokal")
+    parser.add_argument("--workdir", default=None, help="direktori artefak KB & SQLite (default: temp)")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--out", default=None, help="tulis JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="kontraktor-startup-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    env.setdefault("KB_ARTIFACTS_DIR", os.path.join(workdir, "artifacts"))
+    if args.real_model:
+        env["HF_HUB_OFFLINE"] = "1"
+
+    code = _CHILD.format(stub=not args.real_model, timeout=args.timeout)
+    runs = {}
+    # run pertama membangun artefak KB kalau belum ada; run kedua = startup normal worker
+    for label in ("cold_artifacts", "warm_artifacts"):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                              capture_output=True, text=True, timeout=args.timeout + 60)
+        wall = time.perf_counter() - started
+        if proc.returncode != 0:
+            print(proc.stderr[-4000:], file=sys.stderr)
+            return proc.returncode
+        marker = [l for l in proc.stdout.splitlines() if l.startswith("@@STARTUP@@")]
+        status = json.loads(marker[-1][len("@@STARTUP@@"):]) if marker else {}
+        runs[label] = {"wall_s": round(wall, 3), "startup": status}
+        if label == "warm_artifacts":
+            runs[label]["imports"] = summarize(parse_importtime(proc.stderr), args.top)
+
+    report = {"config": vars(args), "workdir": workdir, "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Encoder pengganti SentenceTransformer untuk benchmark tanpa jaringan/GPU.
+
+Vektor dibentuk dari hashing token + trigram karakter, jadi deterministik dan teks yang mirip
+tetap punya cosine similarity tinggi (cukup realistis untuk FAISS/classifier).
+"""
+import sys
+import types
+import hashlib
+import numpy as np
+
+DIM = 384
+
+
+def _feature_vector(feature: str, dim: int):
+    seed = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+class StubSentenceTransformer:
+    def __init__(self, model_name_or_path=None, dim: int = DIM, **kwargs):
+        self.model_name = model_name_or_path
+        self.dim = dim
+        self._features = {}
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _vec(self, feature: str):
+        v = self._features.get(feature)
+        if v is None:
+            v = self._features[feature] = _feature_vector(feature, self.dim)
+        return v
+
+    def encode(self, sentences, convert_to_numpy=True, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, s in enumerate(sentences):
+            text = f" {s.lower()} "
+            for tok in text.split():
+                out[i] += 2.0 * self._vec("w:" + tok)
+            for j in range(len(text) - 2):
+                out[i] += self._vec("c:" + text[j:j + 3])
+        return out[0] if single else out
+
+
+def install():
+    """Pasang stub sebagai modul sentence_transformers (harus sebelum app.embeddings di-import)."""
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = StubSentenceTransformer
+    sys.modules["sentence_transformers"] = module
@@ -0,0 +1,38 @@
+"""conversation_history: simpan alat yang sudah di-resolve per giliran
+
+Revision ID: 3f2a9c1d7b4e
+Revises: 
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b4e'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("conversation_history")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # tabel yang dibuat lewat metadata.create_all (mis. SQLite benchmark) sudah punya kolomnya
+    existing = _columns()
+    if "equipment_ids" not in existing:
+        op.add_column("conversation_history", sa.Column("equipment_ids", sa.JSON(none_as_null=True), nullable=True))
+    if "equipment_type" not in existing:
+        op.add_column("conversation_history", sa.Column("equipment_type", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("conversation_history", "equipment_type")
+    op.drop_column("conversation_history", "equipment_ids")